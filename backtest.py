@@ -0,0 +1,187 @@
+import os
+import sys
+import json
+import time
+import argparse
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+import webmodeloutput as model
+from connection_stats import RESULT_COLUMN, finishing_position
+
+
+RACE_KEY = ["Race Date", "Race Time", "Race Location", "Race Name"]
+BACKTEST_WORKERS = int(os.environ.get("BACKTEST_WORKERS", os.cpu_count() or 1))
+VALUE_FLAG = "💰"
+
+_weights = None  # (weight sets x factors), set once per worker process
+
+
+##############################
+# Race Archive
+##############################
+def archive_files(paths):
+    # Race card files under the given files/directories: .feather cards (not their _runs child
+    # tables) and .csv files, which may hold one race or many.
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files.extend(os.path.join(root, name) for name in names)
+        else:
+            files.append(path)
+    return sorted(f for f in files if f.endswith(".csv") or (f.endswith(".feather") and not f.endswith("_runs.feather")))
+
+def finishing_positions(results):
+    # connection_stats.finishing_position over a column, with NaN for runners that did not finish.
+    return np.array([np.nan if pos is None else float(pos) for pos in map(finishing_position, results)])
+
+def race_day(value):
+    # Race Date as scraped ("DD/MM/YYYY"), in the short form or ISO -> datetime at midnight.
+    for fmt in ("%d/%m/%Y", "%d/%m/%y", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(str(value).strip(), fmt)
+        except ValueError:
+            continue
+    return None
+
+def archive_races(path):
+    # (df, past_runs) per race in the file. Saved cards hold one race with their child table; a CSV
+    # archive is split into races on date, time, course and race name.
+    df, past_runs = model.load_race_card_tables(path)
+    if RESULT_COLUMN not in df.columns or df.empty:
+        return []
+    if past_runs is not None or df.groupby(RACE_KEY, sort=False).ngroups == 1:
+        return [(df.reset_index(drop=True), past_runs)]
+    return [(race.reset_index(drop=True), None) for _, race in df.groupby(RACE_KEY, sort=False)]
+
+##############################
+# Per-race Evaluation
+##############################
+def _init_worker(weights):
+    global _weights
+    _weights = weights
+
+def evaluate_race(df, past_runs, weights):
+    # Scores one race under every weight set and returns per-set outcome arrays. Only the card's
+    # own form is used (no RaceHistoryStore / ConnectionStats), so nothing after the race can leak in,
+    # and its recency decay is anchored at the race day so a replay does not depend on when it runs.
+    positions = finishing_positions(df[RESULT_COLUMN])
+    winners = positions == 1
+    if not winners.any():
+        return None
+    as_of = race_day(df["Race Date"].iat[0])
+    if as_of is None:
+        raise ValueError(f"unparseable Race Date {df['Race Date'].iat[0]!r}")
+    factors = model.compute_factor_matrix(df, past_runs, connection_stats=False, as_of=as_of)
+    scores = weights @ factors.to_numpy().T
+    pricing = model.price_scores(scores, df["Odds"])
+    decimal_odds = model.fractional_odds_array(df["Odds"]) + 1
+
+    picks = np.argmax(scores, axis=1)
+    pick_won = winners[picks]
+    pick_profit = np.where(pick_won, decimal_odds[picks] - 1, -1.0)
+
+    flagged = pricing["value"] == VALUE_FLAG
+    value_bets = flagged.sum(axis=1)
+    value_wins = (flagged & winners[None, :]).sum(axis=1)
+    value_profit = np.where(flagged, np.where(winners[None, :], decimal_odds[None, :] - 1, -1.0), 0).sum(axis=1)
+
+    # Calibrated prices carry the bookmaker overround; normalise them to probabilities first.
+    model_probs = 1 / pricing["calibrated_odds"]
+    model_probs = model_probs / model_probs.sum(axis=1, keepdims=True)
+    market_probs = 1 / decimal_odds
+    market_probs = market_probs / market_probs.sum()
+    winner = np.argmax(winners)
+    return {
+        "runners": len(df),
+        "pick_won": pick_won,
+        "pick_profit": pick_profit,
+        "value_bets": value_bets,
+        "value_wins": value_wins,
+        "value_profit": value_profit,
+        "log_loss": -np.log(np.clip(model_probs[:, winner], 1e-12, 1)),
+        "market_log_loss": -np.log(max(market_probs[winner], 1e-12)),
+    }
+
+def evaluate_file(path):
+    results = []
+    for df, past_runs in archive_races(path):
+        try:
+            outcome = evaluate_race(df, past_runs, _weights)
+        except Exception as e:
+            print(f"Skipping a race in '{path}': {e}", file=sys.stderr)
+            continue
+        if outcome is not None:
+            results.append(outcome)
+    return results
+
+##############################
+# Aggregation
+##############################
+def summarize(outcomes, n_sets):
+    if not outcomes:
+        return pd.DataFrame()
+    stack = lambda key: np.array([o[key] for o in outcomes], dtype=float)
+    races = len(outcomes)
+    value_bets = stack("value_bets").sum(axis=0)
+    value_wins = stack("value_wins").sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return pd.DataFrame({
+            "Weight Set": np.arange(n_sets),
+            "Races": races,
+            "Strike Rate": stack("pick_won").mean(axis=0),
+            "ROI": stack("pick_profit").sum(axis=0) / races,
+            "Value Bets": value_bets.astype(int),
+            "Value Hit Rate": value_wins / value_bets,
+            "Value ROI": stack("value_profit").sum(axis=0) / value_bets,
+            "Log Loss": stack("log_loss").mean(axis=0),
+            "Market Log Loss": stack("market_log_loss").mean(),
+        })
+
+def run_backtest(paths, weight_sets, workers=BACKTEST_WORKERS, chunksize=16):
+    # Replays every archived race through the model_race pipeline under each weight set (one matrix
+    # multiply per race for all sets) across a process pool. Returns one summary row per weight set.
+    weights = model.weights_matrix(weight_sets)
+    files = archive_files(paths)
+    outcomes = []
+    if workers <= 1:
+        _init_worker(weights)
+        for path in files:
+            outcomes.extend(evaluate_file(path))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(weights,)) as executor:
+            for results in executor.map(evaluate_file, files, chunksize=chunksize):
+                outcomes.extend(results)
+    return summarize(outcomes, len(weights))
+
+##############################
+# Main Execution
+##############################
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=f"Backtest model weights over archived race cards with a '{RESULT_COLUMN}' column.")
+    parser.add_argument("archive", nargs="+", help="race card files or directories (.feather / .csv)")
+    parser.add_argument("--weights", help="JSON file with one weights dict or a list of them (default: DEFAULT_WEIGHTS)")
+    parser.add_argument("--workers", type=int, default=BACKTEST_WORKERS)
+    parser.add_argument("--json", action="store_true", help="print the summary as JSON")
+    args = parser.parse_args()
+
+    weight_sets = model.DEFAULT_WEIGHTS
+    if args.weights:
+        with open(args.weights, encoding="utf-8") as f:
+            weight_sets = json.load(f)
+
+    start = time.perf_counter()
+    summary = run_backtest(args.archive, weight_sets, workers=args.workers)
+    elapsed = time.perf_counter() - start
+    if summary.empty:
+        print(f"No races with a '{RESULT_COLUMN}' column and a winner were found.")
+        sys.exit(1)
+    if args.json:
+        print(summary.to_json(orient="records", indent=2))
+    else:
+        print(summary.to_string(index=False, float_format=lambda x: f"{x:.4f}"))
+        races = int(summary["Races"].iloc[0])
+        print(f"\n{races} races in {elapsed:.1f}s ({races / elapsed:.0f} races/sec)")
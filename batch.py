@@ -0,0 +1,147 @@
+import os
+import sys
+import json
+import argparse
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+
+import webmodeloutput as model
+
+
+MODEL_WORKERS = int(os.environ.get("MODEL_WORKERS", os.cpu_count() or 1))
+RACE_COLUMNS = ["Race Date", "Race Time", "Race Location", "Race Name", "Race Type Data"]
+
+
+##############################
+# Inputs
+##############################
+def read_inputs(sources):
+    # One URL or saved racecard path per line from each file ("-" is stdin); blanks and # comments skipped.
+    entries = []
+    for source in sources:
+        stream = sys.stdin if source == "-" else open(source, encoding="utf-8")
+        try:
+            for line in stream:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    entries.append(line)
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+    return entries
+
+def scrape_inputs(entries, workers=model.SCRAPE_WORKERS, source="auto"):
+    # URLs are scraped concurrently (one DriverPool, shared racecard cache); file paths pass straight
+    # through. Returns {entry: racecard file} and {entry: error}. Scraper chatter goes to stderr so
+    # stdout stays machine-readable.
+    urls = [entry for entry in entries if entry.startswith("http")]
+    files = {entry: entry for entry in entries if not entry.startswith("http")}
+    errors = {entry: "file not found" for entry in files if not os.path.exists(entry)}
+    for entry in errors:
+        files.pop(entry)
+    if urls:
+        with contextlib.redirect_stdout(sys.stderr):
+            for url, race_file, error in model.fetch_race_cards_concurrently(urls, workers=workers, source=source):
+                if error is not None:
+                    errors[url] = f"{type(error).__name__}: {error}"
+                else:
+                    files[url] = race_file
+    return files, errors
+
+##############################
+# Modelling
+##############################
+def model_race_file(entry, race_file, weights):
+    # Runs in a worker process; returns a JSON-ready record for one race.
+    try:
+        race = model.load_race_card(race_file).iloc[0]
+        output_df, pricing = model.score_race(race_file, weights)
+    except Exception as e:
+        return {"source": entry, "file": race_file, "error": f"{type(e).__name__}: {e}"}
+    return {
+        "source": entry,
+        "file": race_file,
+        **{column: race[column] for column in RACE_COLUMNS if column in race.index},
+        "bookmaker_overround": float(pricing["bookie_overround"]),
+        "modelled_overround": float((1 / pricing["calibrated_odds"][0]).sum()),
+        "runners": output_df.astype({"MV": int}).to_dict("records"),
+    }
+
+def model_races(files, weights, workers=MODEL_WORKERS):
+    # files is {entry: racecard file}; results come back in the same order.
+    entries = list(files)
+    if workers <= 1 or len(entries) <= 1:
+        return [model_race_file(entry, files[entry], weights) for entry in entries]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(model_race_file, entries, [files[e] for e in entries], [weights] * len(entries)))
+
+##############################
+# Outputs
+##############################
+def race_summary(record):
+    runners = record.get("runners", [])
+    top = runners[0] if runners else {}
+    return {
+        "source": record["source"],
+        **{column: record.get(column) for column in RACE_COLUMNS},
+        "runners": len(runners),
+        "top_pick": top.get("Horse Name"),
+        "top_pick_odds": top.get("Odds"),
+        "top_pick_cfo": top.get("CFO"),
+        "value_picks": ", ".join(r["Horse Name"] for r in runners if r["Value"] == "💰"),
+        "bookmaker_overround": record.get("bookmaker_overround"),
+        "modelled_overround": record.get("modelled_overround"),
+        "error": record.get("error"),
+    }
+
+def write_outputs(records, output_dir, fmt="json"):
+    # One file per race (JSON with race details and runners, or a CSV of the runner table) named
+    # after its racecard file, plus summary.csv with a row per race.
+    os.makedirs(output_dir, exist_ok=True)
+    for record in records:
+        if "error" in record:
+            continue
+        stem = os.path.splitext(os.path.basename(record["file"]))[0]
+        if fmt == "csv":
+            pd.DataFrame(record["runners"]).to_csv(os.path.join(output_dir, f"{stem}.csv"), index=False)
+        else:
+            with open(os.path.join(output_dir, f"{stem}.json"), "w", encoding="utf-8") as f:
+                json.dump(record, f, ensure_ascii=False, indent=2, default=str)
+    summary_path = os.path.join(output_dir, "summary.csv")
+    pd.DataFrame([race_summary(r) for r in records]).to_csv(summary_path, index=False)
+    return summary_path
+
+##############################
+# Main Execution
+##############################
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scrape and model racecards without prompts. Reads one race URL or saved "
+                                                 "racecard file (.feather/.csv) per line and writes JSON lines to stdout.")
+    parser.add_argument("inputs", nargs="*", default=["-"], help="files listing URLs/racecards ('-' or nothing for stdin)")
+    parser.add_argument("--weights", help="JSON file with a weights dict (default: DEFAULT_WEIGHTS)")
+    parser.add_argument("--output-dir", help="also write one file per race and summary.csv here")
+    parser.add_argument("--format", choices=["json", "csv"], default="json", help="per-race file format for --output-dir")
+    parser.add_argument("--scrape-workers", type=int, default=model.SCRAPE_WORKERS)
+    parser.add_argument("--model-workers", type=int, default=MODEL_WORKERS)
+    parser.add_argument("--source", choices=["auto", "http", "browser"], default="auto")
+    args = parser.parse_args()
+
+    weights = model.DEFAULT_WEIGHTS
+    if args.weights:
+        with open(args.weights, encoding="utf-8") as f:
+            weights = json.load(f)
+
+    entries = read_inputs(args.inputs)
+    files, errors = scrape_inputs(entries, workers=args.scrape_workers, source=args.source)
+    modelled = {record["source"]: record for record in model_races(files, weights, workers=args.model_workers)}
+    records = [modelled.get(entry) or {"source": entry, "file": None, "error": errors.get(entry, "not modelled")} for entry in entries]
+
+    for record in records:
+        print(json.dumps(record, ensure_ascii=False, default=str))
+    if args.output_dir:
+        print(f"Summary written to {write_outputs(records, args.output_dir, args.format)}", file=sys.stderr)
+    failed = [r["source"] for r in records if "error" in r]
+    if failed:
+        print(f"❌ {len(failed)} of {len(records)} race(s) failed: {', '.join(failed)}", file=sys.stderr)
+        sys.exit(1)
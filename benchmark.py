@@ -0,0 +1,286 @@
+import os
+import io
+import sys
+import json
+import time
+import random
+import argparse
+import contextlib
+import statistics
+import subprocess
+from datetime import datetime, timedelta
+import pandas as pd
+
+import webmodeloutput as model
+
+
+BASELINE_FILE = os.environ.get("BENCHMARK_BASELINE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json"))
+REGRESSION_TOLERANCE = 0.25  # flag a stage once it is 25% slower than its baseline
+BENCHMARK_WEIGHTS = dict.fromkeys(model.FACTOR_NAMES, 10)
+IMPORT_TARGETS = ["webmodeloutput", "backtest", "batch"]  # modules whose cold import is timed
+SCRAPER_MODULES = ["selenium", "webdriver_manager", "bs4", "requests"]  # none of these should load with them
+
+COURSES = ["Ascot", "Newbury", "Kempton", "York", "Doncaster", "Haydock", "Sandown", "Lingfield"]
+GOINGS = ["Good", "Good to Soft", "Soft", "Heavy", "Good to Firm", "Firm", "Standard"]
+DISTANCES = ["5f", "6f", "7f", "1m", "1m1f", "1m2f", "1m2f110y", "1m4f", "1m6f", "2m", "2m4f", "3m"]
+HEADGEAR = ["None", "None", "None", "b", "v", "h", "t", "p", "b1"]
+COMMENTS = [
+    "Held up in rear, headway over 2f out, ran on well final furlong, nearest finish",
+    "Led, ridden over 1f out, weakened and no extra inside final furlong",
+    "Prominent, challenged 2f out, kept on same pace",
+    "Slowly away, always behind, never involved",
+    "Tracked leaders, quickened to lead inside final furlong, impressive",
+    "No comments available",
+]
+FORM_CHARS = "1234567890PUF-"
+
+
+##############################
+# Synthetic Racecards
+##############################
+def synthetic_race_card(runners=12, history_depth=6, seed=0, race_date=None):
+    # A card in exactly the layout fetch_race_card_data produces (RACE_CARD_COLUMNS, quoted odds,
+    # pipe-joined FormTable rows), so every modelling stage can be timed without scraping.
+    rng = random.Random(seed)
+    race_date = race_date or datetime(2026, 10, 18)
+    course = rng.choice(COURSES)
+    header = model.parse_race_header(
+        f"{rng.randint(13, 20)}:{rng.choice(['00', '15', '30', '45'])} {course}",
+        race_date.strftime("%A %d %B %Y"),
+        f"Synthetic Handicap ({seed})",
+        f"Class {rng.randint(1, 6)} | {rng.choice(DISTANCES)} | {rng.choice(GOINGS)} | {runners} Runners",
+    )
+    rows = []
+    for i in range(runners):
+        past_runs = []
+        for _ in range(history_depth):
+            run_date = race_date - timedelta(days=rng.randint(7, 900))
+            field = rng.randint(4, 20)
+            past_runs.append(model.format_past_run([
+                run_date.strftime("%d/%m/%y"), rng.choice(COURSES), str(rng.randint(1, 6)) if rng.random() < 0.8 else "",
+                rng.choice(DISTANCES), rng.choice(GOINGS), str(rng.randint(45, 115)), f"{rng.randint(1, field)}/{field}",
+            ]))
+        rows.append(header + [
+            f"Synthetic Horse {seed}-{i}",
+            rng.choice(HEADGEAR),
+            str(rng.randint(5, 365)),
+            str(i + 1),
+            f"({rng.randint(1, runners)})",
+            f"Jockey {rng.randint(1, 40)}",
+            f"Trainer {rng.randint(1, 30)}",
+            str(rng.randint(2, 12)),
+            f"{rng.randint(8, 11)}-{rng.randint(0, 13)}",
+            str(rng.randint(45, 115)),
+            "".join(rng.choice(FORM_CHARS) for _ in range(6)),
+            rng.choice(COMMENTS),
+            model.format_odds(rng.choice(model.ODDS_LADDER[30:75])),
+            model.join_past_runs(past_runs),
+        ])
+    return pd.DataFrame(rows, columns=model.RACE_CARD_COLUMNS)
+
+def synthetic_race_cards(races=20, runners=12, history_depth=6, seed=0):
+    return [synthetic_race_card(runners, history_depth, seed + i) for i in range(races)]
+
+##############################
+# Timing
+##############################
+def clear_caches():
+    # Every round starts cold, as the first scoring of a newly scraped card would.
+    model.clear_parse_caches()
+    model.comments_sentiment_factor.cache_clear()
+
+def time_stage(func, cards, repeat):
+    # Median seconds per race over `repeat` rounds of running func on every card.
+    rounds = []
+    for _ in range(repeat):
+        clear_caches()
+        start = time.perf_counter()
+        for card in cards:
+            func(card)
+        rounds.append((time.perf_counter() - start) / len(cards))
+    return statistics.median(rounds)
+
+def scalar_factor_stages():
+    # The per-runner factor functions calculate_composite_score calls, each run over a whole card.
+    def per_runner(factor):
+        def run(card):
+            conditions, histories = card["conditions"], card["histories"]
+            for row, history in zip(card["rows"], histories):
+                factor(row, history, conditions)
+        return run
+
+    return {
+        "factor.odds": per_runner(lambda row, history, c: model.parse_fractional_odds(str(row["Odds"]))),
+        "factor.official_rating": per_runner(lambda row, history, c: model.official_rating_factor(row["Official Rating"])),
+        "factor.past_performance": per_runner(lambda row, history, c: model.parse_past_performance(history, row["Race Date"])),
+        "factor.similar_conditions": per_runner(lambda row, history, c: model.parse_similar_performance(
+            history, c["course"], c["distance"], c["going"], c["class"], row["Race Date"])),
+        "factor.stall": per_runner(lambda row, history, c: model.extract_stall(row["Stall"], c["total_runners"])),
+        "factor.headgear": per_runner(lambda row, history, c: model.parse_headgear_factor(row["Headgear"], row["Comments"])),
+        "factor.age": per_runner(lambda row, history, c: model.age_factor(row["Age"], optimal=7, std=3)),
+        "factor.last_ran": per_runner(lambda row, history, c: model.last_ran_factor(row["Last Ran (Days)"], c["field_stats"]["race_distance"])),
+        "factor.weight_field": per_runner(lambda row, history, c: model.weight_factor(row["Weight"], c["field_stats"]["avg_weight"])),
+        "factor.recent_form": per_runner(lambda row, history, c: model.recent_form_factor(row["Recent Form"])),
+        "factor.comments": per_runner(lambda row, history, c: model.comments_sentiment_factor(row["Comments"])),
+        "factor.course": per_runner(lambda row, history, c: model.course_factor(history, row["Race Location"], row["Race Date"])),
+        "factor.going_suitability": per_runner(lambda row, history, c: model.going_suitability(history, c["going"], row["Race Date"])),
+        "factor.distance_suitability": per_runner(lambda row, history, c: model.distance_suitability(history, c["distance"], row["Race Date"])),
+        "factor.jockey_trainer": per_runner(lambda row, history, c: model.jockey_trainer_factor(history, row["Race Date"])),
+        "factor.class": per_runner(lambda row, history, c: model.class_factor(history, c["class"], row["Race Date"])),
+    }
+
+IMPORT_SCRIPT = """
+import sys, json, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "scraper_modules": [m for m in {scrapers!r} if m in sys.modules]}}))
+"""
+
+def time_import(module, repeat):
+    # Median seconds to import module in a fresh interpreter (bytecode already compiled), plus the
+    # scraper packages that came in with it.
+    here = os.path.dirname(os.path.abspath(__file__))
+    script = IMPORT_SCRIPT.format(module=module, scrapers=SCRAPER_MODULES)
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", script], cwd=here, capture_output=True, text=True, check=True).stdout
+        runs.append(json.loads(output.splitlines()[-1]))
+    return {"seconds": statistics.median(run["seconds"] for run in runs), "scraper_modules": runs[-1]["scraper_modules"]}
+
+def run_import_benchmark(repeat=5, modules=IMPORT_TARGETS):
+    return {module: time_import(module, repeat) for module in modules}
+
+def run_benchmark(races=20, runners=12, history_depth=6, repeat=5, seed=0):
+    dfs = synthetic_race_cards(races, runners, history_depth, seed)
+    cards = []
+    for df in dfs:
+        conditions = model.race_conditions(df)
+        factors = model.compute_factor_matrix(df, conditions=conditions)
+        cards.append({
+            "df": df,
+            "rows": df.to_dict("records"),
+            "conditions": conditions,
+            "histories": [model.parse_race_history(h) for h in df["Past Race History"]],
+            "factors": factors,
+            "scores": model.composite_scores(factors, BENCHMARK_WEIGHTS),
+        })
+
+    def model_quietly(card):
+        with contextlib.redirect_stdout(io.StringIO()):
+            model.model_race(card["df"], BENCHMARK_WEIGHTS)
+
+    stages = scalar_factor_stages()
+    stages.update({
+        "parse_race_history": lambda card: [model.parse_race_history(h) for h in card["df"]["Past Race History"]],
+        "composite.scalar": lambda card: [model.calculate_composite_score(
+            row, BENCHMARK_WEIGHTS, card["conditions"]["field_stats"], card["conditions"]["course"], card["conditions"]["distance"],
+            card["conditions"]["going"], card["conditions"]["class"], card["conditions"]["total_runners"]) for _, row in card["df"].iterrows()],
+        "factor_matrix": lambda card: model.compute_factor_matrix(card["df"]),
+        "composite": lambda card: model.composite_scores(card["factors"], BENCHMARK_WEIGHTS),
+        "calibration": lambda card: model.price_scores(card["scores"], card["df"]["Odds"]),
+        "model_race": model_quietly,
+    })
+
+    results = {}
+    for name, func in stages.items():
+        seconds = time_stage(func, cards, repeat)
+        results[name] = {"seconds_per_race": seconds, "us_per_runner": seconds / runners * 1e6}
+    return {
+        "config": {"races": races, "runners": runners, "history_depth": history_depth, "repeat": repeat, "seed": seed},
+        "races_per_sec": 1 / results["model_race"]["seconds_per_race"],
+        "stages": results,
+        "imports": run_import_benchmark(repeat),
+    }
+
+##############################
+# Baselines
+##############################
+def load_baseline(path=BASELINE_FILE):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def save_baseline(report, path=BASELINE_FILE):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+def find_regressions(report, baseline, tolerance=REGRESSION_TOLERANCE):
+    # Stages slower than baseline * (1 + tolerance); only comparable when the card shape matches.
+    # Import times are always compared, and a model-only import that pulls in a scraper package
+    # is a regression whatever its time.
+    regressions = {}
+    for module, timing in report.get("imports", {}).items():
+        before = (baseline or {}).get("imports", {}).get(module)
+        if timing["scraper_modules"]:
+            regressions[f"import.{module}"] = float("inf")
+        elif before and timing["seconds"] > before["seconds"] * (1 + tolerance):
+            regressions[f"import.{module}"] = timing["seconds"] / before["seconds"]
+    if baseline is None or baseline.get("config", {}).get("runners") != report["config"].get("runners") \
+            or baseline.get("config", {}).get("history_depth") != report["config"].get("history_depth"):
+        return regressions
+    for name, stage in report["stages"].items():
+        before = baseline["stages"].get(name)
+        if before and stage["seconds_per_race"] > before["seconds_per_race"] * (1 + tolerance):
+            regressions[name] = stage["seconds_per_race"] / before["seconds_per_race"]
+    return regressions
+
+def print_report(report, baseline=None, regressions=None):
+    config = report["config"]
+    if report["stages"]:
+        print(f"\n=== Modelling Benchmark: {config['races']} races x {config['runners']} runners, history depth {config['history_depth']} ===")
+        print(f"{'Stage':<30} {'ms/race':>10} {'us/runner':>11} {'vs base':>9}")
+        print("-" * 63)
+        for name, stage in report["stages"].items():
+            before = (baseline or {}).get("stages", {}).get(name)
+            change = f"{stage['seconds_per_race'] / before['seconds_per_race']:.2f}x" if before else ""
+            flag = " <-- regression" if regressions and name in regressions else ""
+            print(f"{name:<30} {stage['seconds_per_race'] * 1e3:>10.3f} {stage['us_per_runner']:>11.1f} {change:>9}{flag}")
+        print("-" * 63)
+        print(f"model_race throughput: {report['races_per_sec']:.1f} races/sec\n")
+    if report.get("imports"):
+        print(f"{'Cold import':<30} {'ms':>10} {'vs base':>9}  scraper modules loaded")
+        print("-" * 63)
+        for module, timing in report["imports"].items():
+            before = (baseline or {}).get("imports", {}).get(module)
+            change = f"{timing['seconds'] / before['seconds']:.2f}x" if before else ""
+            flag = " <-- regression" if regressions and f"import.{module}" in regressions else ""
+            print(f"{module:<30} {timing['seconds'] * 1e3:>10.1f} {change:>9}  {', '.join(timing['scraper_modules']) or '-'}{flag}")
+        print()
+
+##############################
+# Main Execution
+##############################
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time the modelling pipeline on synthetic racecards.")
+    parser.add_argument("--races", type=int, default=20)
+    parser.add_argument("--runners", type=int, default=12)
+    parser.add_argument("--depth", type=int, default=6, help="past runs per horse")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--tolerance", type=float, default=REGRESSION_TOLERANCE)
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the new baseline")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON instead of a table")
+    parser.add_argument("--imports-only", action="store_true", help="only time cold imports of the modelling modules")
+    args = parser.parse_args()
+
+    if args.imports_only:
+        report = {"config": {"repeat": args.repeat}, "stages": {}, "imports": run_import_benchmark(args.repeat)}
+    else:
+        report = run_benchmark(args.races, args.runners, args.depth, args.repeat, args.seed)
+    baseline = load_baseline(args.baseline)
+    regressions = find_regressions(report, baseline, args.tolerance)
+    if args.json:
+        print(json.dumps(dict(report, regressions=regressions), indent=2))
+    else:
+        print_report(report, baseline, regressions)
+    if args.save_baseline:
+        # An --imports-only run refreshes just the import timings of an existing baseline.
+        save_baseline(dict(baseline or {}, imports=report["imports"]) if args.imports_only else report, args.baseline)
+        print(f"Baseline saved to {args.baseline}")
+    elif regressions:
+        print(f"❌ {len(regressions)} stage(s) slower than baseline: {', '.join(regressions)}")
+        sys.exit(1)
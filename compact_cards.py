@@ -0,0 +1,158 @@
+import numpy as np
+import pandas as pd
+
+from webmodeloutput import RACE_CARD_COLUMNS, PAST_RUN_COLUMNS, build_past_runs, parse_weight_to_lbs
+
+
+EPOCH = np.datetime64("1970-01-01", "D")
+MISSING = -1
+RUNNER_FIELDS = [column for column in RACE_CARD_COLUMNS if column != "Past Race History"]
+RACE_FIELDS = ["Race Date", "Race Time", "Race Location", "Race Name", "Race Type Data"]
+PAST_RUN_DTYPE = np.dtype([
+    ("runner", np.int32), ("day", np.int32), ("course", np.int32), ("class", np.int8), ("distance", np.int16),
+    ("going", np.int32), ("official_rating", np.int16), ("pos", np.int16), ("runners", np.int16),
+])
+
+
+##############################
+# Interned Vocabularies
+##############################
+class Vocabulary:
+    # Each distinct string stored once; everything else holds its int32 code. Missing values are -1.
+    __slots__ = ("codes", "values")
+
+    def __init__(self):
+        self.codes = {}
+        self.values = []
+
+    def encode(self, values):
+        codes = self.codes
+        out = np.empty(len(values), dtype=np.int32)
+        for i, value in enumerate(values):
+            if value is None or value != value:
+                out[i] = MISSING
+                continue
+            code = codes.get(value)
+            if code is None:
+                code = codes[value] = len(self.values)
+                self.values.append(value)
+            out[i] = code
+        return out
+
+    def decode(self, codes):
+        values = self.values
+        return np.array([values[code] if code >= 0 else None for code in codes.tolist()], dtype=object)
+
+    def __len__(self):
+        return len(self.values)
+
+def _small_ints(values, dtype):
+    values = np.asarray(values, dtype=float)
+    return np.where(np.isnan(values), MISSING, values).astype(dtype)
+
+def _floats(values):
+    values = values.astype(float)
+    values[values == MISSING] = np.nan
+    return values
+
+##############################
+# Compact Race Cards
+##############################
+class CompactRaceCards:
+    # Many race cards in a handful of flat arrays: runner fields are vocabulary codes, weights are
+    # int16 pounds, and past runs are one structured array (int32 day numbers, interned course and
+    # going, small ints for class, yards, rating, position and field size). card(i) rebuilds the
+    # (runners, past_runs) pair the model takes, so a whole season can stay in one process.
+    __slots__ = ("vocabularies", "course_names", "going_names", "_runner_chunks", "_run_chunks",
+                 "_runner_columns", "_weight_lbs", "_runs", "_runner_offsets", "_run_offsets")
+
+    def __init__(self):
+        self.vocabularies = {field: Vocabulary() for field in RUNNER_FIELDS}
+        self.course_names = Vocabulary()
+        self.going_names = Vocabulary()
+        self._runner_chunks = []
+        self._run_chunks = []
+        self._runner_columns = None
+        self._weight_lbs = None
+        self._runs = None
+        self._runner_offsets = [0]
+        self._run_offsets = [0]
+
+    def add(self, df, past_runs=None):
+        # Takes a card as fetch_race_card_data / load_race_card_tables produce it; returns its index.
+        df = df.reset_index(drop=True)
+        if past_runs is None:
+            past_runs = build_past_runs(df["Past Race History"] if "Past Race History" in df.columns else [])
+        columns = {field: self.vocabularies[field].encode(df[field].tolist()) for field in RUNNER_FIELDS}
+        weight_lbs = _small_ints([parse_weight_to_lbs(weight) for weight in df["Weight"]], np.int16)
+        runs = np.empty(len(past_runs), dtype=PAST_RUN_DTYPE)
+        if len(past_runs):
+            runs["runner"] = past_runs["runner"].to_numpy()
+            runs["day"] = (past_runs["date"].to_numpy().astype("datetime64[D]") - EPOCH).astype(np.int32)
+            runs["course"] = self.course_names.encode(past_runs["course"].tolist())
+            runs["going"] = self.going_names.encode(past_runs["going"].tolist())
+            for field, dtype in [("class", np.int8), ("distance", np.int16), ("official_rating", np.int16), ("pos", np.int16), ("runners", np.int16)]:
+                runs[field] = _small_ints(past_runs[field], dtype)
+        self._runner_chunks.append((columns, weight_lbs))
+        self._run_chunks.append(runs)
+        self._runner_offsets.append(self._runner_offsets[-1] + len(df))
+        self._run_offsets.append(self._run_offsets[-1] + len(runs))
+        return len(self._runner_offsets) - 2
+
+    def _consolidate(self):
+        # Appends land in small chunks; fold them into the flat arrays before reading.
+        if not self._runner_chunks:
+            return
+        parts = ([self._runner_columns] if self._runner_columns is not None else []) + [c for c, _ in self._runner_chunks]
+        self._runner_columns = {field: np.concatenate([p[field] for p in parts]) for field in RUNNER_FIELDS}
+        self._weight_lbs = np.concatenate(([self._weight_lbs] if self._weight_lbs is not None else []) + [w for _, w in self._runner_chunks])
+        self._runs = np.concatenate(([self._runs] if self._runs is not None else []) + self._run_chunks)
+        self._runner_chunks, self._run_chunks = [], []
+
+    def __len__(self):
+        return len(self._runner_offsets) - 1
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.card(i)
+
+    def card(self, i):
+        # (runners, past_runs) for card i: the runner table without "Past Race History" and the
+        # build_past_runs table, ready for model_race / compute_factor_matrix.
+        self._consolidate()
+        start, stop = self._runner_offsets[i], self._runner_offsets[i + 1]
+        df = pd.DataFrame({field: self.vocabularies[field].decode(self._runner_columns[field][start:stop]) for field in RUNNER_FIELDS})
+        runs = self._runs[self._run_offsets[i]:self._run_offsets[i + 1]]
+        past_runs = pd.DataFrame({
+            "runner": runs["runner"].astype(np.int64),
+            "date": (EPOCH + runs["day"].astype(np.int64)).astype("datetime64[ns]"),
+            "course": self.course_names.decode(runs["course"]),
+            "class": _floats(runs["class"]),
+            "distance": _floats(runs["distance"]),
+            "going": self.going_names.decode(runs["going"]),
+            "official_rating": _floats(runs["official_rating"]),
+            "pos": _floats(runs["pos"]),
+            "runners": _floats(runs["runners"]),
+        }, columns=PAST_RUN_COLUMNS)
+        return df, past_runs
+
+    def weight_lbs(self, i):
+        self._consolidate()
+        return _floats(self._weight_lbs[self._runner_offsets[i]:self._runner_offsets[i + 1]])
+
+    def races(self):
+        # One row per card with its race fields, without rebuilding the runner tables.
+        self._consolidate()
+        if not len(self):
+            return pd.DataFrame(columns=RACE_FIELDS)
+        first = np.array(self._runner_offsets[:-1], dtype=np.int64)
+        return pd.DataFrame({field: self.vocabularies[field].decode(self._runner_columns[field][first]) for field in RACE_FIELDS})
+
+    def nbytes(self):
+        self._consolidate()
+        arrays = 0
+        if len(self):
+            arrays = sum(a.nbytes for a in self._runner_columns.values()) + self._weight_lbs.nbytes + self._runs.nbytes
+        strings = sum(sum(len(v) for v in vocabulary.values if isinstance(v, str))
+                      for vocabulary in [*self.vocabularies.values(), self.course_names, self.going_names])
+        return arrays + strings
@@ -0,0 +1,242 @@
+import os
+import re
+import math
+import sqlite3
+import threading
+from datetime import datetime, date
+import numpy as np
+
+
+STATS_DB = os.environ.get("CONNECTION_STATS_DB", os.path.join(os.path.expanduser("~"), ".cache", "racing-model", "connection_stats.sqlite3"))
+DECAY_DAYS = 180  # same recency decay the history factors use
+WINDOWS = (14, 90)
+RESULT_COLUMN = "Finishing Position"
+ALL_COURSES = ""
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS connection_totals (
+    kind TEXT NOT NULL,
+    entity TEXT NOT NULL,
+    course TEXT NOT NULL,
+    runs INTEGER NOT NULL,
+    wins INTEGER NOT NULL,
+    decayed_score REAL NOT NULL,
+    last_day INTEGER NOT NULL,
+    PRIMARY KEY (kind, entity, course)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS connection_days (
+    kind TEXT NOT NULL,
+    entity TEXT NOT NULL,
+    day INTEGER NOT NULL,
+    runs INTEGER NOT NULL,
+    wins INTEGER NOT NULL,
+    PRIMARY KEY (kind, entity, day)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS recorded_results (
+    day INTEGER NOT NULL,
+    course TEXT NOT NULL,
+    horse TEXT NOT NULL,
+    PRIMARY KEY (day, course, horse)
+) WITHOUT ROWID;
+"""
+
+UPSERT_TOTALS = """
+INSERT INTO connection_totals (kind, entity, course, runs, wins, decayed_score, last_day)
+VALUES (:kind, :entity, :course, 1, :win, :score, :day)
+ON CONFLICT (kind, entity, course) DO UPDATE SET
+    runs = runs + 1,
+    wins = wins + :win,
+    decayed_score = CASE WHEN :day >= last_day
+        THEN decayed_score * exp((last_day - :day) / :tau) + :score
+        ELSE decayed_score + :score * exp((:day - last_day) / :tau) END,
+    last_day = max(last_day, :day)
+"""
+
+UPSERT_DAYS = """
+INSERT INTO connection_days (kind, entity, day, runs, wins) VALUES (:kind, :entity, :day, 1, :win)
+ON CONFLICT (kind, entity, day) DO UPDATE SET runs = runs + 1, wins = wins + :win
+"""
+
+MARK_RECORDED = "INSERT OR IGNORE INTO recorded_results (day, course, horse) VALUES (?, ?, ?)"
+
+
+##############################
+# Jockey / Trainer Statistics
+##############################
+def day_number(value):
+    if isinstance(value, datetime):
+        return value.date().toordinal()
+    if isinstance(value, date):
+        return value.toordinal()
+    for fmt in ("%d/%m/%Y", "%d/%m/%y", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(str(value).strip(), fmt).date().toordinal()
+        except ValueError:
+            continue
+    return None
+
+def finishing_position(result):
+    # "1", "1st", 2.0 -> 1, 1, 2; PU, F, UR, blanks and NaN -> None (did not finish, never a winner).
+    match = re.match(r"\s*(\d+)", str(result))
+    return int(match.group(1)) if match else None
+
+def position_score(pos, runners):
+    # Normalised finishing position on the same 0-1 scale as the history factors; pos comes from
+    # finishing_position and a non-finisher scores 0.
+    if pos is None:
+        return 0.0
+    if runners > 1:
+        return 1 - (pos - 1) / (runners - 1)
+    return 1.0 if pos == 1 else 0.0
+
+def connection_keys(jockey, trainer):
+    keys = []
+    if jockey and jockey != "Unknown":
+        keys.append(("jockey", jockey))
+    if trainer and trainer != "Unknown":
+        keys.append(("trainer", trainer))
+    if len(keys) == 2:
+        keys.append(("combination", f"{jockey} / {trainer}"))
+    return keys
+
+class ConnectionStats:
+    # Incrementally maintained aggregates per jockey, trainer and jockey/trainer combination:
+    # runs, wins and a recency-decayed position score overall and per course, plus daily buckets
+    # for the 14/90-day windows. Each result is two upserts per key; a race-time lookup is one
+    # keyed read per entity, so a field costs O(runners) however long the history is.
+    def __init__(self, path=STATS_DB):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.create_function("exp", 1, math.exp, deterministic=True)
+        self._conn.executescript(SCHEMA)
+
+    def record_result(self, race_date, course, jockey, trainer, pos, runners, horse=None):
+        # With a horse name each (date, course, horse) result is counted once, so re-recording a
+        # card (a rerun of the results job) leaves the aggregates unchanged; returns False for it.
+        day = day_number(race_date)
+        if day is None:
+            return False
+        pos = finishing_position(pos)
+        score = position_score(pos, runners)
+        win = 1 if pos == 1 else 0
+        course = (course or "").strip().lower()
+        rows = []
+        for kind, entity in connection_keys(jockey, trainer):
+            for course_key in (ALL_COURSES, course):
+                rows.append({"kind": kind, "entity": entity, "course": course_key, "win": win, "score": score, "day": day, "tau": float(DECAY_DAYS)})
+        with self._lock, self._conn:
+            if isinstance(horse, str) and horse.strip() and not self._conn.execute(MARK_RECORDED, (day, course, horse.strip())).rowcount:
+                return False
+            self._conn.executemany(UPSERT_TOTALS, rows)
+            self._conn.executemany(UPSERT_DAYS, [r for r in rows if r["course"] == ALL_COURSES])
+        return True
+
+    def record_race_results(self, df, result_column=RESULT_COLUMN):
+        # df is a race card in the fetch_race_card_data layout plus a finishing-position column.
+        # Returns how many results were newly recorded; runners already recorded are skipped.
+        runners = len(df)
+        horses = df["Horse Name"] if "Horse Name" in df.columns else [None] * runners
+        recorded = 0
+        for race_date, course, jockey, trainer, pos, horse in zip(df["Race Date"], df["Race Location"], df["Jockey"], df["Trainer"], df[result_column], horses):
+            recorded += self.record_result(race_date, course, jockey, trainer, pos, runners, horse=horse)
+        return recorded
+
+    def lookup(self, jockey, trainer, course=None, as_of=None):
+        return self.lookup_field([jockey], [trainer], course=course, as_of=as_of)[0]
+
+    def lookup_field(self, jockeys, trainers, course=None, as_of=None):
+        # One dict per runner: for each known connection kind, runs/wins/strike rate overall, at this
+        # course and in each window, plus the decayed average position score as of `as_of`.
+        as_of = day_number(as_of) if as_of is not None else date.today().toordinal()
+        course = (course or "").strip().lower()
+        keys = {key for j, t in zip(jockeys, trainers) for key in connection_keys(j, t)}
+        totals, windows = self._read(keys, course, as_of)
+        field = []
+        for jockey, trainer in zip(jockeys, trainers):
+            stats = {}
+            for kind, entity in connection_keys(jockey, trainer):
+                overall = totals.get((kind, entity, ALL_COURSES))
+                if overall is None:
+                    continue
+                runs, wins, decayed_score, last_day = overall
+                entry = {
+                    "runs": runs,
+                    "wins": wins,
+                    "strike_rate": wins / runs,
+                    "score": decayed_score * math.exp(-(as_of - last_day) / DECAY_DAYS) / runs,
+                }
+                at_course = totals.get((kind, entity, course))
+                if course and at_course is not None:
+                    entry["course_runs"], entry["course_wins"] = at_course[0], at_course[1]
+                for window in WINDOWS:
+                    w_runs, w_wins = windows.get((kind, entity, window), (0, 0))
+                    entry[f"runs_{window}d"], entry[f"wins_{window}d"] = w_runs, w_wins
+                stats[kind] = entry
+            field.append(stats)
+        return field
+
+    def _read(self, keys, course, as_of):
+        if not keys:
+            return {}, {}
+        kinds_entities = sorted(keys)
+        values = ", ".join("(?, ?)" for _ in kinds_entities)
+        params = [x for key in kinds_entities for x in key]
+        with self._lock:
+            total_rows = self._conn.execute(
+                f"WITH wanted(kind, entity) AS (VALUES {values}) "
+                "SELECT t.kind, t.entity, t.course, t.runs, t.wins, t.decayed_score, t.last_day "
+                "FROM wanted JOIN connection_totals t ON t.kind = wanted.kind AND t.entity = wanted.entity AND t.course IN (?, ?)",
+                params + [ALL_COURSES, course],
+            ).fetchall()
+            window_rows = self._conn.execute(
+                f"WITH wanted(kind, entity) AS (VALUES {values}) "
+                "SELECT d.kind, d.entity, "
+                + ", ".join("SUM(CASE WHEN d.day > ? THEN d.runs ELSE 0 END), SUM(CASE WHEN d.day > ? THEN d.wins ELSE 0 END)" for _ in WINDOWS)
+                + " FROM wanted JOIN connection_days d ON d.kind = wanted.kind AND d.entity = wanted.entity "
+                "AND d.day > ? AND d.day <= ? GROUP BY d.kind, d.entity",
+                params + [x for window in WINDOWS for x in (as_of - window, as_of - window)] + [as_of - max(WINDOWS), as_of],
+            ).fetchall()
+        totals = {(kind, entity, c): (runs, wins, score, last_day) for kind, entity, c, runs, wins, score, last_day in total_rows}
+        windows = {}
+        for row in window_rows:
+            kind, entity = row[0], row[1]
+            for i, window in enumerate(WINDOWS):
+                windows[(kind, entity, window)] = (row[2 + 2 * i], row[3 + 2 * i])
+        return totals, windows
+
+    def connection_factors(self, df, as_of=None):
+        # Per-runner jockey_trainer factor: mean decayed position score over the runner's known
+        # jockey, trainer and combination; NaN where none of them has any recorded runs.
+        if as_of is None and len(df):
+            as_of = df.iloc[0]["Race Date"]
+            if day_number(as_of) is None:
+                as_of = None
+        course = df.iloc[0]["Race Location"] if len(df) else None
+        field = self.lookup_field(df["Jockey"].tolist(), df["Trainer"].tolist(), course=course, as_of=as_of)
+        return np.array([np.mean([s["score"] for s in stats.values()]) if stats else np.nan for stats in field])
+
+    def close(self):
+        self._conn.close()
+
+##############################
+# Main Execution
+##############################
+if __name__ == "__main__":
+    import argparse
+    import backtest
+    parser = argparse.ArgumentParser(description=f"Record finished races (race cards with a '{RESULT_COLUMN}' column) into the jockey/trainer statistics.")
+    parser.add_argument("results", nargs="+", help="race card files or directories (.feather / .csv)")
+    parser.add_argument("--db", default=STATS_DB, help="statistics database (default: %(default)s)")
+    args = parser.parse_args()
+
+    stats = ConnectionStats(args.db)
+    races = recorded = 0
+    for path in backtest.archive_files(args.results):
+        for df, _ in backtest.archive_races(path):
+            races += 1
+            recorded += stats.record_race_results(df)
+    stats.close()
+    print(f"Recorded {recorded} new result(s) from {races} race(s) into '{args.db}'.")
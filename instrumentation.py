@@ -0,0 +1,173 @@
+import os
+import sys
+import json
+import time
+import threading
+import statistics
+from datetime import datetime
+from contextlib import contextmanager
+
+
+TRACE_FILE = os.environ.get("PIPELINE_TRACE", "")  # JSON lines path, "-" for stderr, empty to disable
+PROFILER = os.environ.get("PIPELINE_PROFILE", "").lower()  # "cprofile", "pyinstrument" or empty
+PROFILE_DIR = os.environ.get("PIPELINE_PROFILE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "racing-model", "profiles"))
+
+_write_lock = threading.Lock()
+_profile_lock = threading.Lock()  # one profiler at a time; nested or concurrent blocks run unprofiled
+_local = threading.local()
+_trace_stream = None
+
+
+##############################
+# Spans
+##############################
+def configure(trace_file=None, profiler=None):
+    # Overrides the PIPELINE_TRACE / PIPELINE_PROFILE settings for this process.
+    global TRACE_FILE, PROFILER, _trace_stream
+    with _write_lock:
+        if trace_file is not None:
+            if _trace_stream is not None and _trace_stream is not sys.stderr:
+                _trace_stream.close()
+            TRACE_FILE, _trace_stream = trace_file, None
+        if profiler is not None:
+            PROFILER = profiler.lower()
+
+def enabled():
+    return bool(TRACE_FILE)
+
+def _stream():
+    global _trace_stream
+    if _trace_stream is None:
+        if TRACE_FILE == "-":
+            _trace_stream = sys.stderr
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(TRACE_FILE)), exist_ok=True)
+            _trace_stream = open(TRACE_FILE, "a", encoding="utf-8", buffering=1)
+    return _trace_stream
+
+def emit(record):
+    line = json.dumps(record, default=str, separators=(",", ":"))
+    with _write_lock:
+        _stream().write(line + "\n")
+
+def record(name, seconds, **fields):
+    # A timing measured elsewhere, written as if it were a span under the current one.
+    if not TRACE_FILE:
+        return
+    stack = getattr(_local, "stack", [])
+    emit({
+        "ts": datetime.now().isoformat(timespec="milliseconds"),
+        "span": name,
+        "parent": stack[-1] if stack else None,
+        "ms": round(seconds * 1000, 3),
+        "pid": os.getpid(),
+        "thread": threading.current_thread().name,
+        **fields,
+    })
+
+@contextmanager
+def span(name, **fields):
+    # Times the block and writes one JSON line per span (with its parent span, process and thread)
+    # when tracing is on; a no-op otherwise. Exceptions are recorded and re-raised.
+    if not TRACE_FILE:
+        yield
+        return
+    stack = _local.__dict__.setdefault("stack", [])
+    stack.append(name)
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException as e:
+        fields["error"] = type(e).__name__
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+        stack.pop()
+        record(name, seconds, **fields)
+
+##############################
+# Profiling
+##############################
+@contextmanager
+def profiled(name):
+    # With PIPELINE_PROFILE=cprofile the block's stats go to PROFILE_DIR as <name>-<time>.prof
+    # (open with pstats or snakeviz); with pyinstrument an HTML call tree is written instead.
+    if PROFILER not in ("cprofile", "pyinstrument") or not _profile_lock.acquire(blocking=False):
+        yield
+        return
+    try:
+        with _run_profiler(name):
+            yield
+    finally:
+        _profile_lock.release()
+
+@contextmanager
+def _run_profiler(name):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    stem = os.path.join(PROFILE_DIR, f"{name}-{datetime.now():%Y%m%d-%H%M%S}-{os.getpid()}")
+    if PROFILER == "pyinstrument":
+        from pyinstrument import Profiler
+        profiler = Profiler()
+        profiler.start()
+        try:
+            yield
+        finally:
+            profiler.stop()
+            with open(f"{stem}.html", "w", encoding="utf-8") as f:
+                f.write(profiler.output_html())
+        return
+    import cProfile
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(f"{stem}.prof")
+
+##############################
+# Aggregation
+##############################
+def load_trace(paths):
+    records = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+    return records
+
+def summarize(records):
+    # Per span: count, total, mean, median, p95 and max milliseconds, plus how many raised.
+    by_span = {}
+    for entry in records:
+        by_span.setdefault(entry["span"], []).append(entry)
+    summary = {}
+    for name, entries in by_span.items():
+        ms = sorted(entry["ms"] for entry in entries)
+        summary[name] = {
+            "count": len(ms),
+            "total_ms": sum(ms),
+            "mean_ms": statistics.fmean(ms),
+            "median_ms": statistics.median(ms),
+            "p95_ms": ms[min(len(ms) - 1, int(0.95 * len(ms)))],
+            "max_ms": ms[-1],
+            "errors": sum(1 for entry in entries if "error" in entry),
+        }
+    return summary
+
+def print_summary(summary):
+    print(f"{'Span':<32} {'count':>7} {'total s':>9} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9} {'err':>5}")
+    print("-" * 96)
+    for name, stats in sorted(summary.items(), key=lambda item: -item[1]["total_ms"]):
+        print(f"{name:<32} {stats['count']:>7} {stats['total_ms'] / 1000:>9.2f} {stats['mean_ms']:>9.2f} "
+              f"{stats['median_ms']:>9.2f} {stats['p95_ms']:>9.2f} {stats['max_ms']:>9.2f} {stats['errors']:>5}")
+
+if __name__ == "__main__":
+    # python instrumentation.py trace.jsonl [more.jsonl ...] -- aggregate a day's runs.
+    if len(sys.argv) < 2:
+        print(f"usage: {sys.argv[0]} TRACE.jsonl [TRACE.jsonl ...]")
+        sys.exit(2)
+    print_summary(summarize(load_trace(sys.argv[1:])))
@@ -0,0 +1,127 @@
+import sys
+import asyncio
+from datetime import datetime, timedelta
+
+import webmodeloutput as model
+
+
+# (minutes before the off, seconds between polls): the first row whose threshold the race is
+# still beyond applies; inside the last threshold the final interval is used until the off.
+POLL_SCHEDULE = [(60, 300), (20, 60), (5, 20), (0, 10)]
+POST_TIME_GRACE = timedelta(minutes=2)  # late starts: keep polling a little past the advertised time
+MAX_CONCURRENT_FETCHES = 8
+FETCH_TIMEOUT = 10
+
+
+##############################
+# Scheduling
+##############################
+def post_time(race):
+    # race is the racecard (or its first row); Race Date is "DD/MM/YYYY" and Race Time "HH:MM".
+    row = race.iloc[0] if hasattr(race, "iloc") else race
+    for fmt in ("%d/%m/%Y %H:%M", "%d/%m/%y %H:%M"):
+        try:
+            return datetime.strptime(f"{row['Race Date']} {row['Race Time']}", fmt)
+        except (ValueError, TypeError):
+            continue
+    return None
+
+def poll_interval(off, now, schedule=POLL_SCHEDULE):
+    # Seconds until the next poll, or None once the race is past its off plus the grace period
+    # (or has no known off at all, since it could never be retired).
+    if off is None:
+        return None
+    if now > off + POST_TIME_GRACE:
+        return None
+    minutes_to_off = (off - now).total_seconds() / 60
+    for threshold, interval in schedule:
+        if minutes_to_off > threshold:
+            return interval
+    return schedule[-1][1]
+
+##############################
+# Polling
+##############################
+def changed_prices(previous, odds):
+    return {name: price for name, price in odds.items() if previous.get(name) != price}
+
+async def poll_race(state, events, semaphore, fetch_odds, clock, schedule, timeout):
+    # One task per race: fetch, push only the moved prices into the race's state and queue a
+    # re-priced table whenever something changed. Fetch errors are reported and retried next tick.
+    off = post_time(state["race"])
+    if off is None:
+        # Without a post time the race would be polled forever and watch_races would never finish.
+        await events.put({"url": state["url"], "event": "error", "time": clock(), "error": "unknown post time; not polling"})
+        await events.put({"url": state["url"], "event": "off", "time": clock()})
+        return
+    last_odds = dict(zip(state["runners"]["Horse Name"], state["runners"]["Odds"]))
+    while True:
+        interval = poll_interval(off, clock(), schedule)
+        if interval is None:
+            await events.put({"url": state["url"], "event": "off", "time": clock()})
+            return
+        try:
+            async with semaphore:
+                odds = await asyncio.to_thread(fetch_odds, state["url"], timeout)
+        except Exception as e:
+            await events.put({"url": state["url"], "event": "error", "time": clock(), "error": f"{type(e).__name__}: {e}"})
+        else:
+            changed = changed_prices(last_odds, odds)
+            if changed:
+                last_odds.update(changed)
+                await events.put({
+                    "url": state["url"],
+                    "event": "prices",
+                    "time": clock(),
+                    "changed": changed,
+                    "output": model.reprice_race(state, changed),
+                })
+        await asyncio.sleep(interval)
+
+async def watch_races(states, fetch_odds=None, clock=datetime.now, schedule=POLL_SCHEDULE,
+                      max_concurrent=MAX_CONCURRENT_FETCHES, timeout=FETCH_TIMEOUT):
+    # Async generator over events from every watched race on one event loop: "prices" (with the
+    # changed prices and the re-priced Horse Name/Odds/CFO/MV/Value table), "error" and "off",
+    # which is the race's last event. states come from model.prepare_repricing(..., url=...).
+    fetch_odds = fetch_odds or (lambda url, timeout: model.fetch_race_odds(url, timeout=timeout))
+    events = asyncio.Queue()
+    semaphore = asyncio.Semaphore(max_concurrent)
+    tasks = [asyncio.create_task(poll_race(state, events, semaphore, fetch_odds, clock, schedule, timeout)) for state in states]
+    remaining = len(tasks)
+    try:
+        while remaining:
+            event = await events.get()
+            if event["event"] == "off":
+                remaining -= 1
+            yield event
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+##############################
+# Main Execution
+##############################
+async def main(urls, weights=model.DEFAULT_WEIGHTS):
+    states = []
+    for url, race_file, error in model.fetch_race_cards_concurrently(urls):
+        if error is not None:
+            print(f"❌ Failed to scrape {url}: {error}")
+        else:
+            states.append(model.prepare_repricing(race_file, weights, url=url))
+    async for event in watch_races(states):
+        race = event["url"]
+        if event["event"] == "prices":
+            moves = ", ".join(f"{name} {price.strip(chr(39))}" for name, price in event["changed"].items())
+            print(f"\n[{event['time']:%H:%M:%S}] {race}: {moves}")
+            print(event["output"].to_string(index=False))
+        elif event["event"] == "error":
+            print(f"[{event['time']:%H:%M:%S}] {race}: {event['error']}")
+        else:
+            print(f"[{event['time']:%H:%M:%S}] {race}: off, no longer polling")
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(f"usage: {sys.argv[0]} RACE_URL [RACE_URL ...]")
+        sys.exit(2)
+    asyncio.run(main(sys.argv[1:]))
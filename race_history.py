@@ -0,0 +1,152 @@
+import os
+import sqlite3
+import threading
+import numpy as np
+import pandas as pd
+
+
+HISTORY_DB = os.environ.get("RACE_HISTORY_DB", os.path.join(os.path.expanduser("~"), ".cache", "racing-model", "race_history.sqlite3"))
+YARDS_PER_BAND = 220  # one furlong per distance band
+EPOCH = np.datetime64("1970-01-01", "D")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS past_runs (
+    horse TEXT NOT NULL,
+    day INTEGER NOT NULL,
+    course TEXT NOT NULL,
+    race_class INTEGER,
+    distance INTEGER,
+    distance_band INTEGER,
+    going TEXT NOT NULL,
+    official_rating INTEGER,
+    pos INTEGER NOT NULL,
+    runners INTEGER NOT NULL,
+    UNIQUE (horse, day, course)
+);
+CREATE INDEX IF NOT EXISTS past_runs_course ON past_runs (course, day);
+CREATE INDEX IF NOT EXISTS past_runs_going ON past_runs (going, day);
+CREATE INDEX IF NOT EXISTS past_runs_distance_band ON past_runs (distance_band, day);
+CREATE INDEX IF NOT EXISTS past_runs_class ON past_runs (race_class, day);
+"""
+
+RUN_COLUMNS = ["horse", "date", "course", "class", "distance", "going", "official_rating", "pos", "runners"]
+
+
+##############################
+# Race History Store
+##############################
+def distance_band(yards):
+    if yards is None or yards != yards:
+        return None
+    return int(yards) // YARDS_PER_BAND
+
+def _int_or_none(value):
+    if value is None or value != value:
+        return None
+    return int(value)
+
+class RaceHistoryStore:
+    # Every past run seen in any scraped FormTable, one row per (horse, day, course), in SQLite.
+    # Course and going are stored lower-case, as parse_race_history produces them; dates are day numbers.
+    def __init__(self, path=HISTORY_DB):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+
+    def add_runs(self, runs):
+        # runs: DataFrame with RUN_COLUMNS (dates as datetimes). Returns how many runs were new.
+        if runs.empty:
+            return 0
+        days = (runs["date"].to_numpy().astype("datetime64[D]") - EPOCH).astype(np.int64)
+        rows = [
+            (horse, int(day), course or "", _int_or_none(race_class), _int_or_none(distance), distance_band(distance),
+             going or "", _int_or_none(official_rating), int(pos), int(runners))
+            for horse, day, course, race_class, distance, going, official_rating, pos, runners in zip(
+                runs["horse"], days, runs["course"].fillna(""), runs["class"], runs["distance"], runs["going"].fillna(""),
+                runs["official_rating"], runs["pos"], runs["runners"])
+        ]
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO past_runs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
+            return self._conn.total_changes - before
+
+    def add_race_card(self, df, past_runs):
+        # past_runs is the card's child table (build_past_runs / load_race_card_tables), keyed by runner position.
+        runs = past_runs.copy()
+        runs["horse"] = df["Horse Name"].to_numpy()[runs["runner"].to_numpy()] if len(runs) else []
+        return self.add_runs(runs)
+
+    def query(self, horses=None, course=None, going=None, distance=None, distance_tolerance=0.1, race_class=None, since=None):
+        # Any combination of filters; each one is served by an index. Returns RUN_COLUMNS.
+        clauses, params = [], []
+        if horses is not None:
+            horses = list(horses)
+            clauses.append(f"horse IN ({', '.join('?' * len(horses))})")
+            params.extend(horses)
+        if course is not None:
+            clauses.append("course = ?")
+            params.append(course.lower())
+        if going is not None:
+            clauses.append("going = ?")
+            params.append(going.lower())
+        if distance:
+            low, high = distance * (1 - distance_tolerance), distance * (1 + distance_tolerance)
+            clauses.append("distance_band BETWEEN ? AND ? AND distance BETWEEN ? AND ?")
+            params.extend([distance_band(low), distance_band(high), low, high])
+        if race_class is not None:
+            clauses.append("race_class = ?")
+            params.append(int(race_class))
+        if since is not None:
+            clauses.append("day >= ?")
+            params.append(int((np.datetime64(since, "D") - EPOCH).astype(np.int64)))
+        sql = "SELECT horse, day, course, race_class, distance, going, official_rating, pos, runners FROM past_runs"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return self._frame(rows)
+
+    def horse_runs(self, horses):
+        return self.query(horses=horses)
+
+    def past_runs_for_card(self, df, past_runs=None):
+        # The card's own runs plus every stored run for its horses, in the build_past_runs layout.
+        names = df["Horse Name"].tolist()
+        stored = self.horse_runs(set(names))
+        runner_of = {name: i for i, name in enumerate(names)}
+        stored.insert(0, "runner", stored["horse"].map(runner_of).astype(np.int64))
+        stored = stored.drop(columns=["horse"])
+        frames = [f for f in [past_runs, stored] if f is not None and len(f)]
+        if not frames:
+            return stored
+        runs = pd.concat(frames, ignore_index=True)
+        return runs.drop_duplicates(subset=["runner", "date", "course"], keep="first").reset_index(drop=True)
+
+    def _frame(self, rows):
+        horse, day, course, race_class, distance, going, official_rating, pos, runners = (
+            zip(*rows) if rows else [()] * len(RUN_COLUMNS)
+        )
+        return pd.DataFrame({
+            "horse": np.array(horse, dtype=object),
+            "date": (EPOCH + np.array(day, dtype=np.int64)).astype("datetime64[ns]"),
+            "course": np.array([c or None for c in course], dtype=object),
+            "class": np.array(race_class, dtype=float),
+            "distance": np.array(distance, dtype=float),
+            "going": np.array([g or None for g in going], dtype=object),
+            "official_rating": np.array(official_rating, dtype=float),
+            "pos": np.array(pos, dtype=float),
+            "runners": np.array(runners, dtype=float),
+        })
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM past_runs").fetchone()[0]
+
+    def close(self):
+        self._conn.close()
@@ -0,0 +1,132 @@
+import os
+import json
+import time
+import hashlib
+import threading
+import pandas as pd
+
+
+CACHE_DIR = os.environ.get("RACECARD_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "racing-model", "racecards"))
+STATIC_TTL = 12 * 60 * 60  # history, form, stall, connections: stable for the day
+ODDS_TTL = 60  # prices move constantly before the off
+MAX_ENTRIES = 500
+MAX_BYTES = 64 * 1024 * 1024
+VOLATILE_COLUMNS = ["Odds"]
+
+
+##############################
+# Racecard Cache
+##############################
+def content_hash(df, columns):
+    payload = json.dumps(df[columns].astype(str).values.tolist(), separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class RaceCardCache:
+    # Parsed racecard rows on disk, one JSON file per URL. Static fields and odds are stamped
+    # separately so a stale price can be refreshed without re-scraping the form.
+    def __init__(self, directory=CACHE_DIR, static_ttl=STATIC_TTL, odds_ttl=ODDS_TTL, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES):
+        self.directory = directory
+        self.static_ttl = static_ttl
+        self.odds_ttl = odds_ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, url):
+        return os.path.join(self.directory, hashlib.sha256(url.encode("utf-8")).hexdigest()[:32] + ".json")
+
+    def _read(self, url):
+        try:
+            with open(self.path(url), encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return entry if entry.get("url") == url else None
+
+    def _write(self, url, entry):
+        path = self.path(url)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    def get(self, url, now=None):
+        # Returns (df, odds_fresh) while the static fields are within their TTL, otherwise None.
+        now = time.time() if now is None else now
+        entry = self._read(url)
+        if entry is None or now - entry["static_saved"] > self.static_ttl:
+            return None
+        try:
+            os.utime(self.path(url))  # mtime doubles as last-used time for eviction
+        except OSError:
+            pass
+        df = pd.DataFrame(entry["rows"], columns=entry["columns"])
+        return df, now - entry["odds_saved"] <= self.odds_ttl
+
+    def put(self, url, df, now=None):
+        # Stores a freshly scraped card; returns True if its static content differs from the cached copy.
+        now = time.time() if now is None else now
+        static_columns = [c for c in df.columns if c not in VOLATILE_COLUMNS]
+        digest = content_hash(df, static_columns)
+        previous = self._read(url)
+        self._write(url, {
+            "url": url,
+            "static_saved": now,
+            "odds_saved": now,
+            "content_hash": digest,
+            "columns": list(df.columns),
+            "rows": df.astype(object).where(df.notna(), None).values.tolist(),
+        })
+        self.evict()
+        return previous is None or previous.get("content_hash") != digest
+
+    def update_odds(self, url, odds, now=None):
+        # odds maps Horse Name to the scraped price string; the static timestamp is left alone.
+        now = time.time() if now is None else now
+        entry = self._read(url)
+        if entry is None:
+            return None
+        df = pd.DataFrame(entry["rows"], columns=entry["columns"])
+        df["Odds"] = [odds.get(name, price) for name, price in zip(df["Horse Name"], df["Odds"])]
+        entry["rows"] = df.values.tolist()
+        entry["odds_saved"] = now
+        self._write(url, entry)
+        return df
+
+    def evict(self):
+        # Drops least recently used entries until both the entry count and byte size fit.
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.directory):
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(self.directory, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+            entries.sort()
+            total = sum(size for _, size, _ in entries)
+            while entries and (len(entries) > self.max_entries or total > self.max_bytes):
+                _, size, path = entries.pop(0)
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                total -= size
+
+    def invalidate(self, url):
+        try:
+            os.remove(self.path(url))
+        except OSError:
+            pass
+
+    def clear(self):
+        for name in os.listdir(self.directory):
+            if name.endswith(".json"):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
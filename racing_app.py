@@ -1,56 +1,95 @@
-import streamlit as st
-import pandas as pd
-from weboutputmodel import fetch_race_card_data, model_race
-
-# Set page title and layout
-st.set_page_config(page_title="Racing Model", layout="wide")
-
-# Title of the app
-st.title("🏇 Sporting Life Racing Model")
-
-# Prompt for the URL
-st.markdown("Enter a Sporting Life Race URL to generate predictions:")
-
-# URL input field
-url = st.text_input("Race URL", "")
-
-# Run Model Button
-if st.button("Run Model"):
-    if url.strip() == "":
-        st.warning("⚠️ Please enter a valid race URL first.")
-    else:
-        with st.spinner("⏳ Running model and fetching data..."):
-            try:
-                # Fetch the race data (you can modify the fetch function as needed)
-                csv_filename = fetch_race_card_data(url)
-
-                # Define model weights (You can adjust the weights as needed)
-                weights = {
-                    "odds": 40,
-                    "official_rating": 10,
-                    "past_performance": 45,
-                    "similar_conditions": 50,
-                    "stall": 5,
-                    "headgear": 5,
-                    "age": 5,
-                    "last_ran": 40,
-                    "weight_field": 20,
-                    "recent_form": 20,
-                    "comments": 10,
-                    "course": 20,
-                    "going_suitability": 20,
-                    "distance_suitability": 20,
-                    "jockey_trainer": 20,
-                    "class": 20
-                }
-
-                # Use the model to get predictions
-                results_df = model_race(csv_filename, weights)
-
-                # Display the results in a nice table
-                st.success("✅ Model completed successfully!")
-                st.markdown("### 📊 Model Output")
-                st.dataframe(results_df, use_container_width=True)
-                
-            except Exception as e:
-                st.error(f"❌ Error: {str(e)}")
+import streamlit as st
+import pandas as pd
+from webmodeloutput import (
+    DriverPool, DEFAULT_WEIGHTS, FACTOR_NAMES, fetch_race_card_data, load_race_card_tables, compute_factor_matrix,
+    composite_scores, priced_output, race_card_cache,
+)
+
+# Scraped cards and their factor matrices are reused for this long; odds move, so keep it short.
+RACE_DATA_TTL = 300
+
+
+##############################
+# Cached Resources and Data
+##############################
+@st.cache_resource
+def driver_pool():
+    # One headless Chrome kept alive across reruns and sessions; only used when the HTTP fetch falls short.
+    return DriverPool(size=1)
+
+@st.cache_data(ttl=RACE_DATA_TTL, show_spinner=False)
+def race_factors(url):
+    # Scrape once per URL and keep the parsed card with its factor matrix, so changing weights
+    # only needs a matrix-vector product.
+    race_file = fetch_race_card_data(url, pool=driver_pool())
+    df, past_runs = load_race_card_tables(race_file)
+    df = df.reset_index(drop=True)
+    return df, compute_factor_matrix(df, past_runs)
+
+@st.cache_data(ttl=RACE_DATA_TTL, show_spinner=False)
+def scored_race(url, weights):
+    df, factors = race_factors(url)
+    scored = df.copy()
+    scored["Composite Score"] = composite_scores(factors, weights)
+    output_df, pricing = priced_output(scored)
+    return output_df, pricing["bookie_overround"], float((1 / pricing["calibrated_odds"][0]).sum())
+
+# Set page title and layout
+st.set_page_config(page_title="Racing Model", layout="wide")
+
+# Title of the app
+st.title("🏇 Sporting Life Racing Model")
+
+# Editable weights; every change reruns the script and rescoring hits the cached factor matrix
+with st.sidebar:
+    st.markdown("### ⚖️ Model Weights")
+    if st.button("Reset weights"):
+        for name in FACTOR_NAMES:
+            st.session_state[f"weight_{name}"] = DEFAULT_WEIGHTS[name]
+    for name in FACTOR_NAMES:
+        st.session_state.setdefault(f"weight_{name}", DEFAULT_WEIGHTS[name])
+    weights = {
+        name: st.number_input(name.replace("_", " ").title(), min_value=0, max_value=200, step=5, key=f"weight_{name}")
+        for name in FACTOR_NAMES
+    }
+
+# Prompt for the URL
+st.markdown("Enter a Sporting Life Race URL to generate predictions:")
+
+# URL input field
+url = st.text_input("Race URL", "")
+
+run_col, refresh_col = st.columns([1, 1])
+
+# Run Model Button
+if run_col.button("Run Model"):
+    if url.strip() == "":
+        st.warning("⚠️ Please enter a valid race URL first.")
+    else:
+        st.session_state["race_url"] = url.strip()
+
+# Drop this race's cached card, in memory and on disk, so the next run re-scrapes prices and form.
+# Scored tables are cheap to rebuild from the other races' cached factors, so those all go.
+if refresh_col.button("Refresh race data") and st.session_state.get("race_url"):
+    disk_cache = race_card_cache()
+    if disk_cache:
+        disk_cache.invalidate(st.session_state["race_url"])
+    race_factors.clear(st.session_state["race_url"])
+    scored_race.clear()
+
+race_url = st.session_state.get("race_url")
+if race_url:
+    with st.spinner("⏳ Running model and fetching data..."):
+        try:
+            results_df, bookie_overround, modelled_overround = scored_race(race_url, weights)
+
+            # Display the results in a nice table
+            st.success("✅ Model completed successfully!")
+            st.markdown("### 📊 Model Output")
+            st.caption(race_url)
+            st.dataframe(results_df, use_container_width=True)
+            st.markdown(f"Bookmaker Overround: **{bookie_overround * 100:.2f}%** · "
+                        f"Calibrated Modelled Overround: **{modelled_overround * 100:.2f}%**")
+
+        except Exception as e:
+            st.error(f"❌ Error: {str(e)}")
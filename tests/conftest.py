@@ -0,0 +1,9 @@
+import os
+import sys
+
+# The modules live at the repository root; keep the on-disk caches and stores out of the tests.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("RACECARD_CACHE", "off")
+os.environ.setdefault("RACE_HISTORY", "off")
+os.environ.setdefault("CONNECTION_STATS", "off")
+os.environ.setdefault("SENTIMENT_BACKEND", "keywords")
@@ -0,0 +1,101 @@
+import io
+import random
+import contextlib
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import backtest
+import benchmark
+import webmodeloutput as model
+from connection_stats import RESULT_COLUMN
+
+
+def result_card(seed, runners=8):
+    df = benchmark.synthetic_race_card(runners, 4, seed)
+    rng = random.Random(seed)
+    positions = list(range(1, runners + 1))
+    rng.shuffle(positions)
+    df[RESULT_COLUMN] = [str(p) if p == 1 or rng.random() > 0.2 else "PU" for p in positions]
+    return df
+
+def pin_clock(monkeypatch, now):
+    class PinnedDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return now
+    monkeypatch.setattr(model, "datetime", PinnedDatetime)
+
+@pytest.fixture(scope="module")
+def archive(tmp_path_factory):
+    # Eight saved cards with their _runs tables plus a CSV holding four more races.
+    path = tmp_path_factory.mktemp("archive")
+    cards = [result_card(seed, 6 + seed % 5) for seed in range(12)]
+    for i, df in enumerate(cards[:8]):
+        model.save_race_card(df, str(path / f"race{i}.feather"))
+    pd.concat(cards[8:]).to_csv(path / "results.csv", index=False)
+    return path, cards
+
+
+def test_archive_files_and_races(archive):
+    path, cards = archive
+    files = backtest.archive_files([str(path)])
+    assert len(files) == 9 and not any(f.endswith("_runs.feather") for f in files)
+    races = backtest.archive_races(str(path / "results.csv"))
+    assert [len(df) for df, _ in races] == [len(df) for df in cards[8:]]
+
+def test_finishing_positions():
+    positions = backtest.finishing_positions(["1", "2nd", 3.0, "PU", "", None])
+    assert positions[:3].tolist() == [1.0, 2.0, 3.0]
+    assert np.isnan(positions[3:]).all()
+
+def test_race_day():
+    assert backtest.race_day("18/10/2026") == datetime(2026, 10, 18)
+    assert backtest.race_day("18/10/26") == backtest.race_day("2026-10-18") == datetime(2026, 10, 18)
+    assert backtest.race_day("Unknown") is None
+
+def test_replay_does_not_depend_on_the_clock(archive, monkeypatch):
+    # Form decay is anchored at each race's own date, so running a year later changes nothing.
+    path, _ = archive
+    summaries = []
+    for now in (datetime(2026, 10, 19), datetime(2027, 10, 19)):
+        pin_clock(monkeypatch, now)
+        summaries.append(backtest.run_backtest([str(path)], model.DEFAULT_WEIGHTS, workers=1))
+    pd.testing.assert_frame_equal(summaries[0], summaries[1])
+
+def test_matches_model_race(archive, monkeypatch):
+    # Strike rate, ROI and value bets of the top pick agree with running model_race on each card
+    # on its race day (the synthetic cards are all run on 18/10/2026).
+    path, cards = archive
+    pin_clock(monkeypatch, datetime(2026, 10, 18))
+    summary = backtest.run_backtest([str(path)], model.DEFAULT_WEIGHTS, workers=1).iloc[0]
+    wins = profit = value_bets = value_wins = 0
+    for df in cards:
+        with contextlib.redirect_stdout(io.StringIO()):
+            output = model.model_race(df.drop(columns=[RESULT_COLUMN]), model.DEFAULT_WEIGHTS)
+        results = dict(zip(df["Horse Name"], df[RESULT_COLUMN]))
+        odds = dict(zip(df["Horse Name"], df["Odds"]))
+        top = output.iloc[0]["Horse Name"]
+        wins += results[top] == "1"
+        profit += model.parse_fractional_odds(odds[top]) if results[top] == "1" else -1
+        flagged = output.loc[output["Value"] == backtest.VALUE_FLAG, "Horse Name"]
+        value_bets += len(flagged)
+        value_wins += sum(results[h] == "1" for h in flagged)
+    assert summary["Races"] == len(cards)
+    assert summary["Strike Rate"] == pytest.approx(wins / len(cards))
+    assert summary["ROI"] == pytest.approx(profit / len(cards))
+    assert summary["Value Bets"] == value_bets
+    if value_bets:
+        assert summary["Value Hit Rate"] == pytest.approx(value_wins / value_bets)
+
+def test_weight_sets_and_process_pool(archive):
+    path, _ = archive
+    weight_sets = [model.DEFAULT_WEIGHTS, benchmark.BENCHMARK_WEIGHTS]
+    serial = backtest.run_backtest([str(path)], weight_sets, workers=1)
+    pooled = backtest.run_backtest([str(path)], weight_sets, workers=2, chunksize=2)
+    assert serial["Weight Set"].tolist() == [0, 1]
+    pd.testing.assert_frame_equal(serial, pooled)
+    single = backtest.run_backtest([str(path)], benchmark.BENCHMARK_WEIGHTS, workers=1)
+    pd.testing.assert_series_equal(single.iloc[0].drop("Weight Set"), serial.iloc[1].drop("Weight Set"), check_names=False)
@@ -0,0 +1,95 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import benchmark
+import webmodeloutput as model
+from connection_stats import ConnectionStats, RESULT_COLUMN, finishing_position
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def stats():
+    stats = ConnectionStats(":memory:")
+    yield stats
+    stats.close()
+
+def results_card(positions, jockeys=None, trainers=None, race_date="18/10/2026", course="Ascot"):
+    n = len(positions)
+    return pd.DataFrame({
+        "Race Date": [race_date] * n,
+        "Race Time": ["14:30"] * n,
+        "Race Location": [course] * n,
+        "Race Name": ["Autumn Stakes"] * n,
+        "Horse Name": [f"Horse {i}" for i in range(n)],
+        "Jockey": jockeys or [f"Jockey {i}" for i in range(n)],
+        "Trainer": trainers or [f"Trainer {i}" for i in range(n)],
+        RESULT_COLUMN: positions,
+    })
+
+
+def test_finishing_position():
+    assert [finishing_position(v) for v in ["1", " 2 ", "1st", "3rd", 1.0, 4, "PU", "F", "", None, np.nan]] == [1, 2, 1, 3, 1, 4, None, None, None, None, None]
+
+@pytest.mark.parametrize("winner", ["1", 1.0, "1st"])
+def test_winner_formats_record_a_win(stats, winner):
+    stats.record_race_results(results_card([winner, "2nd", 3.0]))
+    first, second, third = stats.lookup_field(["Jockey 0", "Jockey 1", "Jockey 2"], ["Trainer 0", "Trainer 1", "Trainer 2"], course="Ascot", as_of="18/10/2026")
+    for kind in ("jockey", "trainer", "combination"):
+        assert (first[kind]["wins"], first[kind]["runs"], first[kind]["score"]) == (1, 1, 1.0)
+    assert (second["jockey"]["wins"], second["jockey"]["score"]) == (0, 0.5)
+    assert third["jockey"]["score"] == 0.0
+
+def test_non_finishers_score_zero(stats):
+    assert stats.record_race_results(results_card(["1", "PU", "", np.nan, None])) == 5
+    field = stats.lookup_field([f"Jockey {i}" for i in range(5)], [f"Trainer {i}" for i in range(5)], as_of="18/10/2026")
+    assert [s["jockey"]["runs"] for s in field] == [1] * 5
+    assert [s["jockey"]["wins"] for s in field] == [1, 0, 0, 0, 0]
+    assert [s["jockey"]["score"] for s in field] == [1.0, 0.0, 0.0, 0.0, 0.0]
+
+def test_results_are_recorded_once(stats):
+    card = results_card(["1", "2"])
+    assert stats.record_race_results(card) == 2
+    assert stats.record_race_results(card) == 0
+    assert stats.lookup("Jockey 0", "Trainer 0", as_of="18/10/2026")["jockey"]["runs"] == 1
+
+def test_course_windows_and_decay(stats):
+    stats.record_race_results(results_card(["1"], ["A Jockey"], ["A Trainer"], race_date="18/10/2026", course="Ascot"))
+    stats.record_race_results(results_card(["2", "1"], ["A Jockey", "B Jockey"], ["A Trainer", "B Trainer"], race_date="18/08/2026", course="York"))
+    entry = stats.lookup("A Jockey", "A Trainer", course="Ascot", as_of="20/10/2026")["jockey"]
+    assert (entry["runs"], entry["wins"], entry["course_runs"], entry["course_wins"]) == (2, 1, 1, 1)
+    assert (entry["runs_14d"], entry["wins_14d"], entry["runs_90d"], entry["wins_90d"]) == (1, 1, 2, 1)
+    decayed = np.exp(-2 / 180) + 0 * np.exp(-63 / 180)
+    assert entry["score"] == pytest.approx(decayed / 2)
+    assert stats.lookup("Nobody", "Unknown") == {}
+
+def test_factor_matrix_uses_connections(stats, monkeypatch):
+    df = benchmark.synthetic_race_card(4, 3, 1)
+    stats.record_race_results(results_card(["1", "2"], df["Jockey"].tolist()[:2], df["Trainer"].tolist()[:2], race_date="11/10/2026"))
+    without = model.compute_factor_matrix(df, connection_stats=False)["jockey_trainer"].to_numpy()
+    with_stats = model.compute_factor_matrix(df, connection_stats=stats)["jockey_trainer"].to_numpy()
+    assert with_stats[0] == pytest.approx(np.exp(-7 / 180))
+    assert with_stats[1] == pytest.approx(0.0)
+    assert (with_stats[2:] == without[2:]).all()
+    # The default comes from the shared store, which CONNECTION_STATS=off (the test setting) disables.
+    assert (model.compute_factor_matrix(df)["jockey_trainer"].to_numpy() == without).all()
+    monkeypatch.setattr(model, "connection_stats_store", lambda: stats)
+    assert (model.compute_factor_matrix(df)["jockey_trainer"].to_numpy() == with_stats).all()
+
+def test_record_results_command(tmp_path):
+    results = pd.concat([results_card(["1", "2"]), results_card(["2", "1"], race_date="19/10/2026")])
+    results.to_csv(tmp_path / "results.csv", index=False)
+    db = str(tmp_path / "stats.sqlite3")
+    for expected in ("Recorded 4 new result(s) from 2 race(s)", "Recorded 0 new result(s) from 2 race(s)"):
+        output = subprocess.run([sys.executable, os.path.join(ROOT, "connection_stats.py"), str(tmp_path / "results.csv"), "--db", db],
+                                capture_output=True, text=True, check=True).stdout
+        assert expected in output
+    stats = ConnectionStats(db)
+    assert stats.lookup("Jockey 0", "Trainer 0", as_of="19/10/2026")["jockey"]["wins"] == 1
+    stats.close()
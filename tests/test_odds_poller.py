@@ -0,0 +1,76 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+import benchmark
+import odds_poller
+import webmodeloutput as model
+
+
+OFF = datetime(2026, 10, 18, 14, 30)
+
+
+class FakeClock:
+    # The stub fetcher moves time on a minute per poll, so a race runs past its off in a few polls.
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+def race_state(url, race_time="14:30"):
+    df = benchmark.synthetic_race_card(5, 3, 1)
+    df["Race Date"], df["Race Time"] = OFF.strftime("%d/%m/%Y"), race_time
+    return model.prepare_repricing(df, model.DEFAULT_WEIGHTS, url=url)
+
+def collect(states, fetch_odds, clock):
+    async def run():
+        return [event async for event in odds_poller.watch_races(states, fetch_odds=fetch_odds, clock=clock, schedule=[(0, 0)])]
+    return asyncio.run(run())
+
+
+def test_post_time_and_poll_interval():
+    assert odds_poller.post_time({"Race Date": "18/10/2026", "Race Time": "14:30"}) == OFF
+    assert odds_poller.post_time({"Race Date": "18/10/2026", "Race Time": "Unknown"}) is None
+    assert odds_poller.poll_interval(OFF, OFF - timedelta(minutes=90)) == 300
+    assert odds_poller.poll_interval(OFF, OFF - timedelta(minutes=30)) == 60
+    assert odds_poller.poll_interval(OFF, OFF - timedelta(minutes=10)) == 20
+    assert odds_poller.poll_interval(OFF, OFF - timedelta(minutes=2)) == 10
+    assert odds_poller.poll_interval(OFF, OFF + odds_poller.POST_TIME_GRACE) == 10
+    assert odds_poller.poll_interval(OFF, OFF + odds_poller.POST_TIME_GRACE + timedelta(seconds=1)) is None
+    assert odds_poller.poll_interval(None, OFF) is None
+
+def test_prices_events_match_reprice_race():
+    state = race_state("race/1")
+    reference = race_state("race/1")
+    clock = FakeClock(OFF - timedelta(minutes=3))
+    first = reference["runners"]["Horse Name"].iloc[0]
+    polls = []
+
+    def fetch_odds(url, timeout):
+        polls.append(url)
+        clock.now += timedelta(minutes=1)
+        odds = dict(zip(reference["runners"]["Horse Name"], reference["runners"]["Odds"]))
+        if len(polls) >= 2:
+            odds[first] = "'9/2"
+        if len(polls) == 3:
+            raise OSError("connection reset")
+        return odds
+
+    events = collect([state], fetch_odds, clock)
+    assert [e["event"] for e in events] == ["prices", "error", "off"]
+    assert events[0]["changed"] == {first: "'9/2"}
+    assert events[1]["error"] == "OSError: connection reset"
+    pd.testing.assert_frame_equal(events[0]["output"], model.reprice_race(reference, {first: "'9/2"}))
+    # Three minutes to the off plus the two-minute grace: polled until the race is retired.
+    assert len(polls) == 6
+
+def test_unknown_post_time_is_reported_and_retired():
+    known, unknown = race_state("race/known"), race_state("race/unknown", race_time="Unknown")
+    clock = FakeClock(OFF + timedelta(hours=1))
+    polls = []
+    events = collect([unknown, known], lambda url, timeout: polls.append(url) or {}, clock)
+    assert [(e["url"], e["event"]) for e in events if e["url"] == "race/unknown"] == [("race/unknown", "error"), ("race/unknown", "off")]
+    assert [(e["url"], e["event"]) for e in events if e["url"] == "race/known"] == [("race/known", "off")]
+    assert polls == []
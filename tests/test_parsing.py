@@ -0,0 +1,84 @@
+import os
+import re
+
+import pytest
+
+import webmodeloutput as model
+
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "racecard.html")
+
+
+@pytest.fixture(scope="module")
+def html():
+    with open(FIXTURE, encoding="utf-8") as f:
+        return f.read()
+
+@pytest.fixture(scope="module")
+def card(html):
+    return model.parse_race_card_html(html)
+
+
+def test_parses_every_column_for_every_runner(card):
+    assert list(card.columns) == model.RACE_CARD_COLUMNS
+    assert len(model.RACE_CARD_COLUMNS) == 19
+    assert card["Horse Name"].tolist() == ["Ascot Dancer", "Blue Horizon", "Cold Snap", "Debutant"]
+
+def test_race_header(card):
+    first = card.iloc[0]
+    assert (first["Race Date"], first["Race Time"], first["Race Location"]) == ("18/10/2026", "14:30", "Ascot")
+    assert first["Race Name"] == "Autumn Stakes Handicap"
+    assert first["Race Type Data"] == "1m2f | Good to Soft | Class 2"
+
+def test_runner_fields(card):
+    runner = card.iloc[0]
+    assert runner["Headgear"] == "b"
+    assert runner["Last Ran (Days)"] == "21"
+    assert (runner["Saddle Cloth"], runner["Stall"]) == ("1", "(3)")
+    assert (runner["Jockey"], runner["Trainer"]) == ("R Moore", "A O'Brien")
+    assert (runner["Age"], runner["Weight"], runner["Official Rating"]) == ("5", "9-7", "88")
+    assert runner["Recent Form"] == "1-21"
+    assert runner["Comments"] == "Led, quickened clear final furlong, impressive"
+
+def test_odds_evens_and_sp(card):
+    # Evens becomes 1/1; a price without a fraction (SP) gets the 1000/1 placeholder.
+    assert card["Odds"].tolist() == ["'1/1", "'5/2", "'1000/1", "'10/1"]
+
+def test_form_table_rows(card):
+    assert card.iloc[0]["Past Race History"] == (
+        "Date: 27/09/26 | Course: Newmarket | Class: 2 | Distance: 1m2f | Going: Good | OR: 85 | Position: 1/9"
+        " |||| Date: 30/08/26 | Course: York | Class: 3 | Distance: 1m1f | Going: Good to Soft | OR: 80 | Position: 2/12"
+    )
+    assert "Class: N/A" in card.iloc[1]["Past Race History"]
+
+def test_runner_without_form_table(card):
+    cold_snap, debutant = card.iloc[2], card.iloc[3]
+    assert cold_snap["Recent Form"] == "4-3"
+    assert cold_snap["Past Race History"] == "Unknown"
+    assert debutant["Recent Form"] == "No form available"
+    assert debutant["Past Race History"] == "Unknown"
+    assert (debutant["Headgear"], debutant["Last Ran (Days)"], debutant["Official Rating"]) == ("None", "Unknown", "Unknown")
+    assert debutant["Comments"] == "No comments available"
+
+def test_race_card_complete(card):
+    # Cold Snap has form but its FormTable was not rendered, so the browser fallback is needed.
+    assert not model.race_card_complete(card)
+    assert model.race_card_complete(card.drop(index=2))
+    assert not model.race_card_complete(card.iloc[0:0])
+
+def test_odds_html_matches_card(html, card):
+    assert model.parse_race_odds_html(html) == dict(zip(card["Horse Name"], card["Odds"]))
+
+def test_odds_html_without_bet_links(html):
+    # Missing prices are omitted instead of reported as a move to the 1000/1 placeholder.
+    assert model.parse_race_odds_html(re.sub(r"<a class=\"BetLink[^>]*>[^<]*</a>", "", html)) == {}
+    first_missing = re.sub(r"<a class=\"BetLink[^>]*>[^<]*</a>", "", html, count=1)
+    assert model.parse_race_odds_html(first_missing) == {"Blue Horizon": "'5/2", "Cold Snap": "'1000/1", "Debutant": "'10/1"}
+
+def test_parsed_history_runs(card):
+    runs = model.build_past_runs(card["Past Race History"])
+    assert runs["runner"].tolist() == [0, 0, 1]
+    assert runs["course"].tolist() == ["newmarket", "york", "ascot"]
+    assert runs["pos"].tolist() == [1.0, 2.0, 3.0]
+    assert runs["runners"].tolist() == [9.0, 12.0, 8.0]
+    assert runs["distance"].tolist() == [2200.0, 1980.0, 2200.0]
@@ -0,0 +1,53 @@
+import os
+import re
+import time
+
+import pytest
+
+import benchmark
+import webmodeloutput as model
+from racecard_cache import RaceCardCache
+
+
+URL = "http://example.invalid/racing/racecards/2026-10-18/ascot/racecard/1001"
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "racecard.html")
+BET_LINK_RE = re.compile(r"<a class=\"BetLink[^>]*>[^<]*</a>")
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return RaceCardCache(directory=str(tmp_path), odds_ttl=60)
+
+def stale_odds_entry(cache, df):
+    cache.put(URL, df, now=time.time() - 120)
+
+
+def test_fresh_entry_is_served_as_saved(cache):
+    card = benchmark.synthetic_race_card(6, 3, 2)
+    cache.put(URL, card, now=1000)
+    df, odds_fresh = cache.get(URL, now=1030)
+    assert odds_fresh and df["Odds"].tolist() == card["Odds"].tolist()
+    assert not cache.get(URL, now=1061)[1]
+    assert cache.get(URL, now=1000 + cache.static_ttl + 1) is None
+
+def test_stale_odds_are_refreshed(cache, monkeypatch):
+    card = benchmark.synthetic_race_card(6, 3, 2)
+    stale_odds_entry(cache, card)
+    odds = dict(zip(card["Horse Name"], card["Odds"]))
+    odds[card["Horse Name"].iloc[0]] = "'9/2"
+    monkeypatch.setattr(model, "fetch_race_odds", lambda url, timeout: odds)
+    df = model.load_cached_race_card(URL, cache)
+    assert df["Odds"].tolist() == [odds[name] for name in card["Horse Name"]]
+    assert cache.get(URL)[1]
+
+@pytest.mark.parametrize("removed", [0, 1])
+def test_missing_prices_force_a_full_scrape(cache, monkeypatch, removed):
+    # Markup with runners but no (or only some) BetLinks must not overwrite the cached prices.
+    with open(FIXTURE, encoding="utf-8") as f:
+        html = f.read()
+    card = model.parse_race_card_html(html)
+    stale_odds_entry(cache, card)
+    monkeypatch.setattr(model, "fetch_race_odds", lambda url, timeout: model.parse_race_odds_html(BET_LINK_RE.sub("", html, count=removed)))
+    assert model.load_cached_race_card(URL, cache) is None
+    df, odds_fresh = cache.get(URL)
+    assert not odds_fresh and df["Odds"].tolist() == card["Odds"].tolist()
@@ -0,0 +1,76 @@
+import os
+
+import pandas as pd
+import pytest
+
+import benchmark
+import webmodeloutput as model
+from racecard_cache import RaceCardCache
+
+pytest.importorskip("streamlit")
+from streamlit.testing.v1 import AppTest
+
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "racing_app.py")
+
+
+@pytest.fixture
+def app_cache(tmp_path, monkeypatch):
+    # The app reads cards through the shared on-disk cache; point it at a seeded temporary one
+    # and record any scrape the app falls back to instead of touching the network.
+    cache = RaceCardCache(directory=str(tmp_path / "cache"))
+    scrapes = []
+
+    def scrape_race_card_data(url, pool=None, timeout=None, source="auto"):
+        scrapes.append(url)
+        df = benchmark.synthetic_race_card(8, 4, 7)
+        df["Odds"] = "'3/1"
+        return df
+
+    monkeypatch.setattr(model, "race_card_cache", lambda: cache)
+    monkeypatch.setattr(model, "scrape_race_card_data", scrape_race_card_data)
+    monkeypatch.setattr(model, "RACE_CARD_DIR", str(tmp_path))
+    return cache, scrapes
+
+def run_app(url):
+    at = AppTest.from_file(APP, default_timeout=60).run()
+    at.text_input[0].input(url).run()
+    next(b for b in at.button if b.label == "Run Model").click().run()
+    assert not at.exception, at.exception
+    assert not at.error, [e.value for e in at.error]
+    return at
+
+def reference_output(df, weights):
+    scored = df.reset_index(drop=True)
+    return model.model_race(scored, weights)
+
+
+def test_table_matches_model_race(app_cache):
+    cache, scrapes = app_cache
+    url = "http://example.invalid/racing/racecards/2026-10-18/ascot/racecard/1001"
+    df = benchmark.synthetic_race_card(10, 4, 3)
+    cache.put(url, df)
+    at = run_app(url)
+    weights = {name: at.session_state[f"weight_{name}"] for name in model.FACTOR_NAMES}
+    pd.testing.assert_frame_equal(at.dataframe[0].value.reset_index(drop=True), reference_output(df, weights).reset_index(drop=True), check_dtype=False)
+    # Changing a weight rescores from the cached factors without another scrape.
+    at.number_input(key="weight_odds").set_value(0).run()
+    weights["odds"] = 0
+    pd.testing.assert_frame_equal(at.dataframe[0].value.reset_index(drop=True), reference_output(df, weights).reset_index(drop=True), check_dtype=False)
+    assert scrapes == []
+
+def test_refresh_rescrapes_only_the_current_race(app_cache):
+    cache, scrapes = app_cache
+    url = "http://example.invalid/racing/racecards/2026-10-18/ascot/racecard/1002"
+    other = "http://example.invalid/racing/racecards/2026-10-18/ascot/racecard/1003"
+    cache.put(url, benchmark.synthetic_race_card(10, 4, 3))
+    cache.put(other, benchmark.synthetic_race_card(9, 4, 5))
+    at = run_app(url)
+    before = at.dataframe[0].value
+    next(b for b in at.button if b.label == "Refresh race data").click().run()
+    assert not at.exception, at.exception
+    assert scrapes == [url]
+    assert cache.get(other) is not None
+    after = at.dataframe[0].value
+    assert len(after) == 8 and not after.equals(before)
+    assert set(cache.get(url)[0]["Odds"]) == {"'3/1"}
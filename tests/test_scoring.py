@@ -0,0 +1,89 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import benchmark
+import webmodeloutput as model
+
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "racecard.html")
+
+
+def scalar_scores(df, weights):
+    # The original row-by-row model: calculate_composite_score on every runner.
+    conditions = model.race_conditions(df)
+    return np.array([
+        model.calculate_composite_score(row, weights, conditions["field_stats"], conditions["course"], conditions["distance"],
+                                        conditions["going"], conditions["class"], conditions["total_runners"])
+        for row in df.to_dict("records")
+    ])
+
+def scalar_factors(df):
+    conditions = model.race_conditions(df)
+    avg_weight = conditions["field_stats"]["avg_weight"]
+    return {
+        "official_rating": [model.official_rating_factor(v) for v in df["Official Rating"]],
+        "stall": [model.extract_stall(v, conditions["total_runners"]) for v in df["Stall"]],
+        "headgear": [model.parse_headgear_factor(h, c) for h, c in zip(df["Headgear"], df["Comments"])],
+        "age": [model.age_factor(v) for v in df["Age"]],
+        "weight_field": [model.weight_factor(v, avg_weight) for v in df["Weight"]],
+        "recent_form": [model.recent_form_factor(v) for v in df["Recent Form"]],
+    }
+
+def fixture_card():
+    with open(FIXTURE, encoding="utf-8") as f:
+        return model.parse_race_card_html(f.read())
+
+CARDS = [benchmark.synthetic_race_card(runners, depth, seed) for runners, depth, seed in [(12, 6, 0), (8, 0, 1), (16, 10, 2), (1, 3, 3)]]
+
+
+@pytest.mark.parametrize("df", CARDS + [fixture_card()])
+@pytest.mark.parametrize("weights", [model.DEFAULT_WEIGHTS, benchmark.BENCHMARK_WEIGHTS])
+def test_vectorized_scores_match_scalar(df, weights):
+    vectorized = model.composite_scores(model.compute_factor_matrix(df), weights)
+    np.testing.assert_allclose(vectorized, scalar_scores(df, weights), rtol=1e-12)
+
+def test_awkward_values_match_scalar():
+    # Unparseable, missing and oddly formatted values take each factor's fallback in both engines.
+    df = benchmark.synthetic_race_card(8, 2, 5).astype(object)
+    df.loc[0, ["Stall", "Official Rating", "Weight", "Age"]] = ["Unknown", "Unknown", "9-x", "Unknown"]
+    df.loc[1, ["Stall", "Headgear", "Comments"]] = [" (2) ", "Blinkers, Hood", "first-time blinkers, hood"]
+    df.loc[2, ["Headgear", "Comments", "Recent Form"]] = ["v", "First-time visor", "1-F-P"]
+    df.loc[3, ["Stall", "Headgear", "Recent Form"]] = ["", "", "-12-"]
+    df.loc[4, ["Headgear", "Recent Form"]] = [None, "No form available"]
+    df.loc[5, ["Recent Form", "Official Rating"]] = ["1F 2,3", "nan"]
+    df.loc[6, "Recent Form"] = None
+    factors = model.compute_factor_matrix(df)
+    for name, expected in scalar_factors(df).items():
+        np.testing.assert_allclose(factors[name].to_numpy(), np.array(expected, dtype=float), rtol=1e-12, err_msg=name)
+
+def test_factor_matrix_layout():
+    df = CARDS[0]
+    factors = model.compute_factor_matrix(df)
+    assert list(factors.columns) == model.FACTOR_NAMES
+    assert factors.index.equals(df.index)
+    assert not factors.isna().any().any()
+
+def test_past_runs_table_matches_row_parser():
+    df = CARDS[2]
+    runs = model.build_past_runs(df["Past Race History"])
+    expected = [
+        (runner, run["date"], run["course"], run["pos"], run["runners"])
+        for runner, history in enumerate(df["Past Race History"])
+        for run in model.parse_race_history(history)
+    ]
+    actual = list(zip(runs["runner"], runs["date"], runs["course"], runs["pos"], runs["runners"]))
+    assert actual == [(r, pd.Timestamp(d), c, p, n) for r, d, c, p, n in expected]
+
+def test_closest_ladder_indices_match_linear_scan():
+    # The ladder keeps 15/8 before 7/4; lookups must pick what min() over the ladder in its own
+    # order picks, including at exact prices and at midpoints between neighbours.
+    assert model.ODDS_LADDER[44:46] == ["15/8", "7/4"]
+    ladder = model.LADDER_DECIMAL.tolist()
+    midpoints = [(a + b) / 2 for a, b in zip(ladder, ladder[1:])]
+    values = ladder + midpoints + np.random.default_rng(0).uniform(1.0, 1200.0, 2000).tolist() + [0.5, 5000.0]
+    expected = [min(range(len(ladder)), key=lambda i: abs(ladder[i] - value)) for value in values]
+    assert model.closest_ladder_indices(values).tolist() == expected
+    assert model.closest_ladder_indices([np.nan]).tolist() == [0]
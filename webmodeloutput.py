@@ -3,16 +3,22 @@ os.environ["TF_CPP_MIN_LOG_LEVEL"] = "3"  # Suppress TensorFlow and other logs
 import time
 import re
 import math
+import queue
+import threading
+import functools
+import hashlib
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import pandas as pd
 import numpy as np
-from fractions import Fraction
-from datetime import datetime
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+from datetime import datetime, date, timedelta
+from urllib.parse import urljoin
+# selenium, webdriver_manager, requests and bs4 are imported inside the scraping functions, so
+# model-only callers (the app's scoring, backtests, batch workers) never pay for them.
+from racecard_cache import RaceCardCache
+from race_history import RaceHistoryStore
+from connection_stats import ConnectionStats
+from instrumentation import span, profiled
 
 
 ##############################
@@ -44,47 +50,361 @@ def parse_weight_to_lbs(weight_str):
     except:
         return np.nan
 
-def fetch_race_card_data(url):
-    from selenium import webdriver
-    from selenium.webdriver.chrome.service import Service
-    from selenium.webdriver.common.by import By
+RACE_CARD_DIR = os.environ.get("RACE_CARD_DIR", ".")
+SCRAPE_WORKERS = int(os.environ.get("SCRAPE_WORKERS", 3))
+PAGE_TIMEOUT = 60  # overall seconds allowed to load and read a single racecard
+FORM_TIMEOUT = 5  # longest wait for one runner's FormTable after expanding it
+
+HEADER_TITLE_SELECTOR = "p.CourseListingHeader__StyledMainTitle-sc-af53af6-5"
+RUNNER_CLASS = "Runner__StyledRunnerContainer-sc-c8a39dcf-0"
+FORM_BUTTON_CLASS = "Runner__StyledFormButton-sc-c8a39dcf-3"
+FORM_TABLE_SELECTOR = "table[class^='FormTable__']"
+
+RACE_CARD_COLUMNS = [
+    "Race Date", "Race Time", "Race Location", "Race Name", "Race Type Data", "Horse Name", "Headgear",
+    "Last Ran (Days)", "Saddle Cloth", "Stall", "Jockey", "Trainer", "Age", "Weight", "Official Rating",
+    "Recent Form", "Comments", "Odds", "Past Race History"
+]
+
+@functools.lru_cache(maxsize=None)
+def chromedriver_path():
+    # Resolving the driver binary hits the network and the filesystem, so do it once per process.
     from webdriver_manager.chrome import ChromeDriverManager
-    import pandas as pd
-    import time
-    from datetime import datetime
-    import os
-    import re
+    with span("chromedriver.install"):
+        return ChromeDriverManager().install()
 
-    service = Service(ChromeDriverManager().install(), service_log_path=os.devnull)
+def create_driver():
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+    service = Service(chromedriver_path(), service_log_path=os.devnull)
     options = webdriver.ChromeOptions()
     options.add_argument("--headless=new")
     options.add_argument("--log-level=3")
     options.add_experimental_option('excludeSwitches', ['enable-logging'])
-    driver = webdriver.Chrome(service=service, options=options)
-    driver.get(url)
-    time.sleep(5)
+    with span("driver.launch"):
+        return webdriver.Chrome(service=service, options=options)
+
+class DriverPool:
+    # Keeps up to `size` headless Chrome sessions alive so a list of races pays one browser
+    # launch per worker rather than one per race. Use as a context manager to quit them all.
+    def __init__(self, size=1):
+        self.size = size
+        self._idle = queue.Queue()
+        self._drivers = []
+        self._starting = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def driver(self):
+        driver = self._checkout()
+        try:
+            yield driver
+        except:
+            # A session that raised (page-load timeout, crashed tab) is not trusted for the next race.
+            self.discard(driver)
+            raise
+        self._idle.put(driver)
+
+    def _checkout(self):
+        while True:
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                pass
+            with self._lock:
+                launch = len(self._drivers) + self._starting < self.size
+                if launch:
+                    self._starting += 1
+            if launch:
+                try:
+                    driver = create_driver()
+                finally:
+                    with self._lock:
+                        self._starting -= 1
+                with self._lock:
+                    self._drivers.append(driver)
+                return driver
+            try:
+                return self._idle.get(timeout=1)
+            except queue.Empty:
+                continue
+
+    def discard(self, driver):
+        with self._lock:
+            if driver in self._drivers:
+                self._drivers.remove(driver)
+        try:
+            driver.quit()
+        except:
+            pass
+
+    def close(self):
+        with self._lock:
+            drivers, self._drivers = self._drivers, []
+        self._idle = queue.Queue()
+        for driver in drivers:
+            try:
+                driver.quit()
+            except:
+                pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def race_card_filename(df, url=None):
+    # <date>_<time>_<course>.feather, so every day's cards accumulate in RACE_CARD_DIR instead of
+    # overwriting the last meeting's. Cards with an unreadable header are named after the race id
+    # in their URL (or a hash of it), so concurrent scrapes never share a file.
+    if not df.empty:
+        race_date, race_time, race_location = (df[column].iat[0] for column in ["Race Date", "Race Time", "Race Location"])
+        try:
+            race_date = datetime.strptime(race_date, "%d/%m/%Y").strftime("%Y-%m-%d")
+        except (TypeError, ValueError):
+            race_date = "Unknown"
+        if "Unknown" not in (race_date, race_time, race_location):
+            return f"{race_date}_{race_time.replace(':', '-')}_{race_location}.feather"
+    if url:
+        match = RACECARD_LINK_RE.search(url)
+        race_id = match.group(3) if match else hashlib.sha1(url.encode("utf-8")).hexdigest()[:12]
+        return f"Unknown_Race_{race_id}.feather"
+    return "Unknown_Race.feather"
+
+def fetch_race_card_data(url, pool=None, timeout=PAGE_TIMEOUT, source="auto", cache=None):
+    # cache=None uses the shared on-disk racecard cache (unless RACECARD_CACHE=off), cache=False
+    # bypasses it, or pass a RaceCardCache. Cached form is reused within its TTL and only stale
+    # odds are re-read.
+    with span("fetch_race_card", url=url), profiled("fetch_race_card"):
+        cache = race_card_cache() if cache is None else cache
+        with span("cache.lookup"):
+            df = load_cached_race_card(url, cache, timeout) if cache else None
+        if df is None:
+            df = scrape_race_card_data(url, pool=pool, timeout=timeout, source=source)
+            if cache and not df.empty:
+                cache.put(url, df)
+        filename = os.path.join(RACE_CARD_DIR, race_card_filename(df, url))
+        with span("race_card.save", runners=len(df)):
+            past_runs = build_past_runs(df["Past Race History"])
+            save_race_card(df, filename, past_runs)
+        store = race_history_store()
+        if store is not None:
+            with span("history.add"):
+                store.add_race_card(df, past_runs)
+    print("=====================================")
+    print(f"Race card data successfully saved as '{filename}'.")
+    return filename
+
+def scrape_race_card_data(url, pool=None, timeout=PAGE_TIMEOUT, source="auto"):
+    # source="auto" reads the server-rendered racecard over HTTP and only falls back to headless
+    # Chrome when that markup is missing runners or form tables; "http" and "browser" force one path.
+    # FormTables are only rendered after each form button is clicked, so the HTTP markup passes
+    # race_card_complete only for cards where no runner has form: for ordinary cards "auto" costs
+    # one extra request before Chrome starts, and "http" is not a browser-free substitute.
+    df = None
+    if source in ("auto", "http"):
+        try:
+            with span("scrape.http"):
+                df = scrape_race_card_http(url, timeout=timeout)
+        except Exception as e:
+            if source == "http":
+                raise
+            print(f"HTTP fetch failed for '{url}' ({e}); falling back to the browser.")
+        if source == "auto" and df is not None and not race_card_complete(df):
+            df = None
+    if df is None:
+        if pool is None:
+            with DriverPool() as pool:
+                return scrape_race_card_data(url, pool=pool, timeout=timeout, source="browser")
+        with pool.driver() as driver, span("scrape.browser"):
+            df = scrape_race_card(driver, url, timeout=timeout)
+    return df
+
+@functools.lru_cache(maxsize=None)
+def race_card_cache():
+    if os.environ.get("RACECARD_CACHE", "").lower() in ("0", "off", "false", "no"):
+        return None
+    return RaceCardCache()
+
+@functools.lru_cache(maxsize=None)
+def race_history_store():
+    # Every scraped FormTable row is accumulated here unless RACE_HISTORY=off.
+    if os.environ.get("RACE_HISTORY", "").lower() in ("0", "off", "false", "no"):
+        return None
+    return RaceHistoryStore()
 
+@functools.lru_cache(maxsize=None)
+def connection_stats_store():
+    # Jockey/trainer results recorded with `python connection_stats.py RESULTS...` feed the
+    # jockey_trainer factor unless CONNECTION_STATS=off; runners with no record keep the form value.
+    if os.environ.get("CONNECTION_STATS", "").lower() in ("0", "off", "false", "no"):
+        return None
+    return ConnectionStats()
+
+def load_cached_race_card(url, cache, timeout=PAGE_TIMEOUT):
+    cached = cache.get(url)
+    if cached is None:
+        return None
+    df, odds_fresh = cached
+    if odds_fresh:
+        return df
+    try:
+        odds = fetch_race_odds(url, timeout=timeout)
+    except Exception:
+        return None
+    if set(odds) != set(df["Horse Name"]):
+        return None  # runners changed (non-runners, reserves) or prices missing; take a full scrape instead
+    return cache.update_odds(url, odds)
+
+def fetch_race_odds(url, timeout=PAGE_TIMEOUT, session=None):
+    return parse_race_odds_html(fetch_race_card_html(url, timeout=timeout, session=session))
+
+def parse_race_odds_html(html):
+    # Horse Name -> odds (as stored in the Odds column), building soup only for the runner containers.
+    # Runners without a BetLink are left out rather than given the 1000/1 placeholder, so markup
+    # with no prices never looks like a market move.
+    from bs4 import BeautifulSoup, SoupStrainer
+    runners_only = SoupStrainer(class_=lambda value: value is not None and RUNNER_CLASS in value.split())
+    soup = BeautifulSoup(html, "html.parser", parse_only=runners_only)
+    odds = {}
+    for runner in soup.select(f".{RUNNER_CLASS}"):
+        name = runner.select_one("a[data-test-id='horse-name-link']")
+        price = runner.select_one(".BetLink__BetLinkStyle-sc-7392938a-0")
+        if name is not None and price is not None:
+            odds[" ".join(name.get_text().split())] = format_odds(" ".join(price.get_text().split()))
+    return odds
+
+def fetch_race_cards(urls, pool=None, source="auto", cache=None):
+    if pool is None:
+        with DriverPool() as pool:
+            return fetch_race_cards(urls, pool=pool, source=source, cache=cache)
+    return [fetch_race_card_data(url, pool=pool, source=source, cache=cache) for url in urls]
+
+def fetch_race_cards_concurrently(urls, workers=SCRAPE_WORKERS, timeout=PAGE_TIMEOUT, pool=None, source="auto", cache=None):
+    # Scrapes races in parallel, one browser per worker, yielding (url, csv_filename, error) as each
+    # race finishes so callers can model it straight away. A failed race yields its exception and
+    # does not stop the rest of the batch.
+    own_pool = pool is None
+    if own_pool:
+        pool = DriverPool(size=workers)
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(fetch_race_card_data, url, pool, timeout, source, cache): url for url in urls}
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result(), None
+                except Exception as e:
+                    yield futures[future], None, e
+    finally:
+        if own_pool:
+            pool.close()
+
+##############################
+# Browser-free Racecard Fetching
+##############################
+HTTP_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-GB,en;q=0.9",
+}
+
+@functools.lru_cache(maxsize=None)
+def http_session():
+    # One keep-alive connection pool per process, shared by every HTTP racecard fetch.
+    import requests
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=max(SCRAPE_WORKERS, 4), max_retries=2)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update(HTTP_HEADERS)
+    return session
+
+def fetch_race_card_html(url, timeout=PAGE_TIMEOUT, session=None):
+    with span("http.get"):
+        response = (session or http_session()).get(url, timeout=timeout)
+        response.raise_for_status()
+        return response.text
+
+def scrape_race_card_http(url, timeout=PAGE_TIMEOUT, session=None):
+    # Markup only (the embedded page JSON has no documented schema); runners with form come back
+    # with Past Race History "Unknown" unless the page already carries their FormTables.
+    html = fetch_race_card_html(url, timeout=timeout, session=session)
+    with span("html.parse"):
+        return parse_race_card_html(html)
+
+def race_card_complete(df):
+    # Server-rendered markup is only usable if it has runners and every runner with form has its FormTable.
+    if df.empty:
+        return False
+    has_form = df["Recent Form"] != "No form available"
+    return bool((~has_form | (df["Past Race History"] != "Unknown")).all())
+
+##############################
+# Browser Racecard Scraping
+##############################
+def wait_until(driver, condition, deadline, cap=None):
+    # WebDriverWait bounded by the race's overall deadline; returns None instead of raising on timeout.
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.common.exceptions import TimeoutException
+    remaining = deadline - time.monotonic()
+    if cap is not None:
+        remaining = min(remaining, cap)
     try:
-        time_location_text = driver.find_element(By.CSS_SELECTOR, "p.CourseListingHeader__StyledMainTitle-sc-af53af6-5").text
-        race_time, race_location = time_location_text.split()
-        race_time = race_time.replace(":", "-")
+        return WebDriverWait(driver, max(remaining, 0.1), poll_frequency=0.1).until(condition)
+    except TimeoutException:
+        return None
+
+def scrape_race_card(driver, url, timeout=PAGE_TIMEOUT, extract="html"):
+    # extract="html" expands every form in one script and parses a single page_source snapshot;
+    # extract="elements" reads each field through its own WebDriver call.
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support import expected_conditions as EC
+    deadline = time.monotonic() + timeout
+    driver.set_page_load_timeout(timeout)
+    with span("page.load"):
+        driver.get(url)
+        wait_until(driver, EC.presence_of_element_located((By.CSS_SELECTOR, HEADER_TITLE_SELECTOR)), deadline)
+        wait_until(driver, EC.presence_of_all_elements_located((By.CLASS_NAME, RUNNER_CLASS)), deadline)
+    if extract == "html":
+        with span("forms.expand"):
+            expand_all_forms(driver, deadline)
+        with span("html.parse"):
+            return parse_race_card_html(driver.page_source)
+    with span("page.read"):
+        return read_race_card_elements(driver, deadline)
+
+EXPAND_FORMS_SCRIPT = """
+const buttons = document.querySelectorAll('.' + arguments[0]);
+buttons.forEach(button => button.click());
+return buttons.length;
+"""
+
+COUNT_FORM_TABLES_SCRIPT = """
+return Array.from(document.querySelectorAll(arguments[0])).filter(table => table.querySelector('td')).length;
+"""
+
+def expand_all_forms(driver, deadline):
+    expanded = driver.execute_script(EXPAND_FORMS_SCRIPT, FORM_BUTTON_CLASS)
+    if expanded:
+        wait_until(driver, lambda d: d.execute_script(COUNT_FORM_TABLES_SCRIPT, FORM_TABLE_SELECTOR) >= expanded, deadline, cap=FORM_TIMEOUT)
+    return expanded
+
+def parse_race_header(title_text, date_text, name_text, meta_text):
+    try:
+        race_time, race_location = title_text.split()
     except:
         race_time = "Unknown"
         race_location = "Unknown"
 
     try:
-        date_text = driver.find_element(By.CSS_SELECTOR, "p.CourseListingHeader__StyledMainSubTitle-sc-af53af6-7").text
         race_date = datetime.strptime(date_text, "%A %d %B %Y").strftime("%d/%m/%Y")
     except:
         race_date = "Unknown"
 
-    try:
-        race_name = driver.find_element(By.CSS_SELECTOR, "h1[data-test-id='racecard-race-name']").text
-    except:
-        race_name = "Unknown"
+    race_name = name_text if name_text is not None else "Unknown"
 
     try:
-        meta_text = driver.find_element(By.CSS_SELECTOR, "li.RacingRacecardSummary__StyledAdditionalInfo-sc-ff7de2c2-3").text
         parts = [p.strip() for p in meta_text.split("|")]
         distance = next((p for p in parts if "m" in p), "Unknown")
         going = next((p for p in parts if "Good" in p or "Soft" in p or "Firm" in p), "Unknown")
@@ -92,10 +412,38 @@ def fetch_race_card_data(url):
         race_type_data = f"{distance} | {going} | {race_class}"
     except:
         race_type_data = "Unknown"
+    return [race_date, race_time, race_location, race_name, race_type_data]
+
+def format_odds(raw_odds):
+    if "Evs" in raw_odds:
+        return "'1/1"
+    elif "/" in raw_odds:
+        return f"'{raw_odds.strip()}"
+    return "'1000/1"
+
+def parse_horse_info(horse_info):
+    age = weight = official_rating = "Unknown"
+    for part in [p.strip() for p in horse_info.split("|")]:
+        if "Age:" in part:
+            age = part.replace("Age:", "").strip()
+        elif "Weight:" in part:
+            weight = part.replace("Weight:", "").strip()
+        elif "OR:" in part:
+            official_rating = part.replace("OR:", "").strip()
+    return age, weight, official_rating
+
+def format_past_run(cells):
+    if len(cells) < 7:
+        return None
+    date, course, race_class, distance, going, orating, position = [c.strip() for c in cells[:7]]
+    return f"Date: {date} | Course: {course} | Class: {race_class or 'N/A'} | Distance: {distance} | Going: {going} | OR: {orating} | Position: {position}"
 
-    csv_filename = f"{race_time}_{race_location}.csv" if race_time != "Unknown" and race_location != "Unknown" else "Unknown_Race.csv"
-    runners = driver.find_elements(By.CLASS_NAME, "Runner__StyledRunnerContainer-sc-c8a39dcf-0")
-    race_data = []
+def join_past_runs(past_form_list):
+    past_form_list = [run for run in past_form_list if run]
+    return " |||| ".join(past_form_list) if past_form_list else "Unknown"
+
+def read_race_card_elements(driver, deadline):
+    from selenium.webdriver.common.by import By
 
     def safe_find(find_func, by, selector, default="Unknown"):
         try:
@@ -103,16 +451,18 @@ def fetch_race_card_data(url):
         except:
             return default
 
+    header = parse_race_header(
+        safe_find(driver.find_element, By.CSS_SELECTOR, HEADER_TITLE_SELECTOR, None),
+        safe_find(driver.find_element, By.CSS_SELECTOR, "p.CourseListingHeader__StyledMainSubTitle-sc-af53af6-7", None),
+        safe_find(driver.find_element, By.CSS_SELECTOR, "h1[data-test-id='racecard-race-name']", None),
+        safe_find(driver.find_element, By.CSS_SELECTOR, "li.RacingRacecardSummary__StyledAdditionalInfo-sc-ff7de2c2-3", None),
+    )
+    runners = driver.find_elements(By.CLASS_NAME, RUNNER_CLASS)
+    race_data = []
+
     for runner in runners:
         horse_name = safe_find(runner.find_element, By.CSS_SELECTOR, "a[data-test-id='horse-name-link']")
-        raw_odds = safe_find(runner.find_element, By.CLASS_NAME, "BetLink__BetLinkStyle-sc-7392938a-0", default="")
-        if "Evs" in raw_odds:
-            odds = "'1/1"
-        elif "/" in raw_odds:
-            odds = f"'{raw_odds.strip()}"
-        else:
-            odds = "'1000/1"
-
+        odds = format_odds(safe_find(runner.find_element, By.CLASS_NAME, "BetLink__BetLinkStyle-sc-7392938a-0", default=""))
         headgear = safe_find(runner.find_element, By.CSS_SELECTOR, "sup[data-test-id='headgear']", "None")
         last_ran = safe_find(runner.find_element, By.CSS_SELECTOR, "sup[data-test-id='last-ran']", "Unknown")
         saddle_cloth = safe_find(runner.find_element, By.CLASS_NAME, "SaddleAndStall__StyledSaddleClothNo-sc-2df3fa22-1")
@@ -123,69 +473,82 @@ def fetch_race_card_data(url):
         trainer = sub_info[1].text if len(sub_info) > 1 else "Unknown"
 
         try:
-            horse_info = runner.find_element(By.CLASS_NAME, "Runner__StyledSubInfo-sc-c8a39dcf-4").text
-            parts = [p.strip() for p in horse_info.split("|")]
-            age = weight = official_rating = "Unknown"
-            for part in parts:
-                if "Age:" in part:
-                    age = part.replace("Age:", "").strip()
-                elif "Weight:" in part:
-                    weight = part.replace("Weight:", "").strip()
-                elif "OR:" in part:
-                    official_rating = part.replace("OR:", "").strip()
+            age, weight, official_rating = parse_horse_info(runner.find_element(By.CLASS_NAME, "Runner__StyledSubInfo-sc-c8a39dcf-4").text)
         except:
             age = weight = official_rating = "Unknown"
 
-        form_string = safe_find(runner.find_element, By.CLASS_NAME, "Runner__StyledFormButton-sc-c8a39dcf-3", "No form available").replace("Form:", "").strip()
+        form_string = safe_find(runner.find_element, By.CLASS_NAME, FORM_BUTTON_CLASS, "No form available").replace("Form:", "").strip()
         comments = safe_find(runner.find_element, By.CSS_SELECTOR, "div[data-test-id='commentary']", "No comments available")
 
         try:
-            expand_button = runner.find_element(By.CLASS_NAME, "Runner__StyledFormButton-sc-c8a39dcf-3")
+            expand_button = runner.find_element(By.CLASS_NAME, FORM_BUTTON_CLASS)
             driver.execute_script("arguments[0].click();", expand_button)
-            time.sleep(1.2)
+            wait_until(driver, lambda _: runner.find_elements(By.CSS_SELECTOR, f"{FORM_TABLE_SELECTOR} td"), deadline, cap=FORM_TIMEOUT)
         except:
             pass
 
         past_form_list = []
         try:
-            form_table = runner.find_element(By.CSS_SELECTOR, "table[class^='FormTable__']")
-            rows = form_table.find_elements(By.TAG_NAME, "tr")[1:]
-            for row in rows:
-                cols = row.find_elements(By.TAG_NAME, "td")
-                if len(cols) >= 7:
-                    date = cols[0].text.strip()
-                    course = cols[1].text.strip()
-                    race_class = cols[2].text.strip() or "N/A"
-                    distance = cols[3].text.strip()
-                    going = cols[4].text.strip()
-                    orating = cols[5].text.strip()
-                    position = cols[6].text.strip()
-                    past_form_list.append(
-                        f"Date: {date} | Course: {course} | Class: {race_class} | Distance: {distance} | Going: {going} | OR: {orating} | Position: {position}"
-                    )
+            form_table = runner.find_element(By.CSS_SELECTOR, FORM_TABLE_SELECTOR)
+            for row in form_table.find_elements(By.TAG_NAME, "tr")[1:]:
+                past_form_list.append(format_past_run([col.text for col in row.find_elements(By.TAG_NAME, "td")]))
         except:
             pass
 
-        past_race_history = " |||| ".join(past_form_list) if past_form_list else "Unknown"
-
-        race_data.append([
-            race_date, race_time.replace("-", ":"), race_location, race_name, race_type_data, horse_name, headgear,
-            last_ran, saddle_cloth, stall_number, jockey, trainer, age, weight, official_rating,
-            form_string, comments, odds, past_race_history
+        race_data.append(header + [
+            horse_name, headgear, last_ran, saddle_cloth, stall_number, jockey, trainer, age, weight, official_rating,
+            form_string, comments, odds, join_past_runs(past_form_list)
         ])
 
-    driver.quit()
+    return pd.DataFrame(race_data, columns=RACE_CARD_COLUMNS)
 
-    columns = [
-        "Race Date", "Race Time", "Race Location", "Race Name", "Race Type Data", "Horse Name", "Headgear",
-        "Last Ran (Days)", "Saddle Cloth", "Stall", "Jockey", "Trainer", "Age", "Weight", "Official Rating",
-        "Recent Form", "Comments", "Odds", "Past Race History"
-    ]
+def parse_race_card_html(html):
+    # Offline equivalent of read_race_card_elements over one page_source snapshot.
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, "html.parser")
 
-    df = pd.DataFrame(race_data, columns=columns)
-    print("=====================================")
-    print(f"Race card data successfully saved as '{csv_filename}'.")
-    return csv_filename
+    def text_of(node, selector, default="Unknown"):
+        found = node.select_one(selector)
+        if found is None:
+            return default
+        return " ".join(found.get_text().split())
+
+    header = parse_race_header(
+        text_of(soup, HEADER_TITLE_SELECTOR, None),
+        text_of(soup, "p.CourseListingHeader__StyledMainSubTitle-sc-af53af6-7", None),
+        text_of(soup, "h1[data-test-id='racecard-race-name']", None),
+        text_of(soup, "li.RacingRacecardSummary__StyledAdditionalInfo-sc-ff7de2c2-3", None),
+    )
+    race_data = []
+
+    for runner in soup.select(f".{RUNNER_CLASS}"):
+        horse_name = text_of(runner, "a[data-test-id='horse-name-link']")
+        odds = format_odds(text_of(runner, ".BetLink__BetLinkStyle-sc-7392938a-0", ""))
+        headgear = text_of(runner, "sup[data-test-id='headgear']", "None")
+        last_ran = text_of(runner, "sup[data-test-id='last-ran']")
+        saddle_cloth = text_of(runner, ".SaddleAndStall__StyledSaddleClothNo-sc-2df3fa22-1")
+        stall_number = text_of(runner, ".SaddleAndStall__StyledStallNo-sc-2df3fa22-2")
+
+        sub_info = [" ".join(link.get_text().split()) for link in runner.select(".Runner__StyledSubInfoLink-sc-c8a39dcf-16")]
+        jockey = sub_info[0] if len(sub_info) > 0 else "Unknown"
+        trainer = sub_info[1] if len(sub_info) > 1 else "Unknown"
+
+        age, weight, official_rating = parse_horse_info(text_of(runner, ".Runner__StyledSubInfo-sc-c8a39dcf-4", ""))
+        form_string = text_of(runner, f".{FORM_BUTTON_CLASS}", "No form available").replace("Form:", "").strip()
+        comments = text_of(runner, "div[data-test-id='commentary']", "No comments available")
+
+        past_form_list = []
+        form_table = runner.select_one(FORM_TABLE_SELECTOR)
+        if form_table is not None:
+            for row in form_table.find_all("tr")[1:]:
+                past_form_list.append(format_past_run([" ".join(td.get_text().split()) for td in row.find_all("td")]))
+
+        race_data.append(header + [
+            horse_name, headgear, last_ran, saddle_cloth, stall_number, jockey, trainer, age, weight, official_rating,
+            form_string, comments, odds, join_past_runs(past_form_list)
+        ])
+
+    return pd.DataFrame(race_data, columns=RACE_CARD_COLUMNS)
 
 
 
@@ -227,17 +590,25 @@ def age_factor(age_str, optimal=7, std=3):
     except:
         return 0.5
 
+# Distance, date and class strings repeat across runners and races, so these parsers are memoized.
+PARSE_CACHE_SIZE = 4096
+DISTANCE_MILES_RE = re.compile(r"(\d+)m")
+DISTANCE_FURLONGS_RE = re.compile(r"(\d+)f")
+DISTANCE_YARDS_RE = re.compile(r"(\d+)y")
+RACE_CLASS_RE = re.compile(r"Class (\d+)")
+
+@functools.lru_cache(maxsize=PARSE_CACHE_SIZE)
 def parse_distance(distance_str):
     miles = 0
     furlongs = 0
     yards = 0
-    match = re.search(r"(\d+)m", distance_str)
+    match = DISTANCE_MILES_RE.search(distance_str)
     if match:
         miles = int(match.group(1))
-    match = re.search(r"(\d+)f", distance_str)
+    match = DISTANCE_FURLONGS_RE.search(distance_str)
     if match:
         furlongs = int(match.group(1))
-    match = re.search(r"(\d+)y", distance_str)
+    match = DISTANCE_YARDS_RE.search(distance_str)
     if match:
         yards = int(match.group(1))
     total_yards = miles * 1760 + furlongs * 220 + yards
@@ -256,18 +627,30 @@ def get_todays_going(race_type_data):
         return parts[2].lower()
     return None
 
+@functools.lru_cache(maxsize=PARSE_CACHE_SIZE)
 def parse_class_from_race_type(race_type_data):
-    match = re.search(r"Class (\d+)", race_type_data)
+    match = RACE_CLASS_RE.search(race_type_data)
     if match:
         return int(match.group(1))
     return None
 
+@functools.lru_cache(maxsize=PARSE_CACHE_SIZE)
 def parse_date(date_str):
     try:
         return datetime.strptime(date_str, "%d/%m/%y")
     except:
         return None
 
+PARSE_CACHES = {"distance": parse_distance, "date": parse_date, "class": parse_class_from_race_type}
+
+def parse_cache_stats():
+    # Hits, misses and size of each memoized parser, e.g. {"date": {"hits": 950, "misses": 50, ...}}.
+    return {name: func.cache_info()._asdict() for name, func in PARSE_CACHES.items()}
+
+def clear_parse_caches():
+    for func in PARSE_CACHES.values():
+        func.cache_clear()
+
 def last_ran_factor(last_ran_str, distance_yards):
     try:
         last_ran = float(last_ran_str)
@@ -317,70 +700,58 @@ def recent_form_factor(form_str):
     else:
         return 0.5
 
-def comments_sentiment_factor(comments):
+POSITIVE_WORDS = [
+    "win", "favour", "good", "strong", "excellent", "headway", "ran on", "stayed on", "kept on", 
+    "quickened", "challenge", "led", "cosily", "comfortable", "impressive", "dominant", "fluent", 
+    "powerful", "smart", "game", "brave", "battled", "eased", "burst", "cruised", "relished", 
+    "promising", "progressed", "nearest finish"
+]
+NEGATIVE_WORDS = [
+    "loss", "poor", "unlucky", "weak", "weakened", "no impression", "not quite pace", "hung left", 
+    "same pace", "regressed", "no extra", "faded", "struggled", "outpaced", "laboured", "tailed off", 
+    "never involved", "disappointing", "found little", "flat", "dropped away", "beaten", "hampered", 
+    "awkward", "slow"
+]
+KEYWORD_SCORES = [(word, 1.5) for word in POSITIVE_WORDS] + [(word, -1.5) for word in NEGATIVE_WORDS]
+SENTIMENT_BACKEND = os.environ.get("SENTIMENT_BACKEND", "auto")  # auto, textblob or keywords
+SENTIMENT_CACHE_SIZE = 8192
+
+def textblob_sentiment_factor(comments):
+    from textblob import TextBlob
     try:
-        from textblob import TextBlob
-        blob = TextBlob(comments)
-        polarity = blob.sentiment.polarity
-        return 1 + polarity
-    except ImportError:
-        score = simple_sentiment(comments)
-        return 1 + 0.1 * score
+        return 1 + TextBlob(comments).sentiment.polarity
     except:
         return 1.0
 
+def keyword_sentiment_factor(comments):
+    return 1 + 0.1 * simple_sentiment(comments)
+
+SENTIMENT_BACKENDS = {"textblob": textblob_sentiment_factor, "keywords": keyword_sentiment_factor}
+
+@functools.lru_cache(maxsize=None)
+def sentiment_backend(name=SENTIMENT_BACKEND):
+    # Picked once per process: TextBlob when it is installed, otherwise the keyword scorer.
+    if name == "auto":
+        try:
+            import textblob
+            name = "textblob"
+        except ImportError:
+            name = "keywords"
+    return SENTIMENT_BACKENDS[name]
+
+@functools.lru_cache(maxsize=SENTIMENT_CACHE_SIZE)
+def comments_sentiment_factor(comments):
+    return sentiment_backend()(comments)
+
+def comments_sentiment_factors(comments):
+    # Scores every comment of a race at once; repeated texts come straight from the cache.
+    return np.array([comments_sentiment_factor(text) for text in _values(comments)], dtype=float)
+
 def simple_sentiment(comments):
     if not isinstance(comments, str):
         return 0
     text = comments.lower()
-    score = 0
-    positive_words = [
-        "win", "favour", "good", "strong", "excellent", "headway", "ran on", "stayed on", "kept on", 
-        "quickened", "challenge", "led", "cosily", "comfortable", "impressive", "dominant", "fluent", 
-        "powerful", "smart", "game", "brave", "battled", "eased", "burst", "cruised", "relished", 
-        "promising", "progressed", "nearest finish"
-    ]
-    negative_words = [
-        "loss", "poor", "unlucky", "weak", "weakened", "no impression", "not quite pace", "hung left", 
-        "same pace", "regressed", "no extra", "faded", "struggled", "outpaced", "laboured", "tailed off", 
-        "never involved", "disappointing", "found little", "flat", "dropped away", "beaten", "hampered", 
-        "awkward", "slow"
-    ]
-    for word in positive_words:
-        if word in text:
-            score += 1.5
-    for word in negative_words:
-        if word in text:
-            score -= 1.5
-    return score
-
-def course_factor(past_history, race_location, race_date):
-    if not isinstance(past_history, str) or not past_history.strip():
-        return 0.5
-    today = parse_date(race_date) or datetime.now()
-    races = re.split(r"\|\|\|\|", past_history)
-    scores = []
-    for race in races:
-        date_match = re.search(r"Date:\s*([^|]+)", race)
-        course_match = re.search(r"Course:\s*([^|]+)", race)
-        pos_match = re.search(r"Position:\s*(\d+)\s*/\s*(\d+)", race)
-        if date_match and course_match and pos_match:
-            past_date_str = date_match.group(1).strip()
-            past_course = course_match.group(1).strip().lower()
-            pos = float(pos_match.group(1))
-            total = float(pos_match.group(2))
-            past_date = parse_date(past_date_str)
-            if past_course == race_location.lower() and past_date:
-                days_ago = (today - past_date).days
-                decay = math.exp(-days_ago / 180)
-                if total > 1:
-                    score = (1 - (pos - 1) / (total - 1)) * decay
-                else:
-                    score = (1 if pos == 1 else 0) * decay
-                scores.append(score)
-    if scores:
-        return sum(scores) / len(scores)
-    return 0.5
+    return sum(score for word, score in KEYWORD_SCORES if word in text)
 
 def parse_fractional_odds(odds_str):
     try:
@@ -404,189 +775,145 @@ def parse_fractional_odds_to_decimal(odds_str):
         return np.nan
 
 
-def parse_past_performance(past_history, race_date):
+def extract_stall(stall_str, total_runners):
+    if not isinstance(stall_str, str) or stall_str.strip() == "" or stall_str == "Unknown":
+        return 0.5  # Default for missing/invalid stall data
+    stall_str = stall_str.strip().lstrip("(").rstrip(")")
+    try:
+        stall = float(stall_str)
+        return 1 - (stall - 1) / (total_runners - 1) if total_runners > 1 else 0.5
+    except:
+        return 0.5  # Fallback for any parsing errors
+
+##############################
+# Past Race History Table
+##############################
+RUN_SEPARATOR = re.compile(r"\|\|\|\|")
+RUN_DATE_RE = re.compile(r"Date:\s*([^|]+)")
+RUN_COURSE_RE = re.compile(r"Course:\s*([^|]+)")
+RUN_CLASS_RE = re.compile(r"Class:\s*(\d+)")
+RUN_DISTANCE_RE = re.compile(r"Distance:\s*([^|]+)")
+RUN_GOING_RE = re.compile(r"Going:\s*([^|]+)")
+RUN_OR_RE = re.compile(r"OR:\s*(\d+)")
+RUN_POSITION_RE = re.compile(r"Position:\s*(\d+)\s*/\s*(\d+)")
+
+def parse_race_history(past_history):
+    # Turns the " |||| " joined FormTable rows into one record per past run.
+    # Runs without a readable date or finishing position are dropped, as no
+    # factor can score them. Already-parsed tables are passed straight through.
+    if isinstance(past_history, list):
+        return past_history
     if not isinstance(past_history, str) or not past_history.strip():
-        return 0.5
-    today = parse_date(race_date) or datetime.now()
-    races = re.split(r"\|\|\|\|", past_history)
-    scores = []
-    for race in races:
-        date_match = re.search(r"Date:\s*([^|]+)", race)
-        pos_match = re.search(r"Position:\s*(\d+)\s*/\s*(\d+)", race)
-        if date_match and pos_match:
-            past_date_str = date_match.group(1).strip()
-            pos = float(pos_match.group(1))
-            total = float(pos_match.group(2))
-            past_date = parse_date(past_date_str)
-            if past_date:
-                days_ago = (today - past_date).days
-                decay = math.exp(-days_ago / 180)
-                if total > 1:
-                    score = (1 - (pos - 1) / (total - 1)) * decay
-                else:
-                    score = (1 if pos == 1 else 0) * decay
-                scores.append(score)
+        return []
+    runs = []
+    for race in RUN_SEPARATOR.split(past_history):
+        date_match = RUN_DATE_RE.search(race)
+        pos_match = RUN_POSITION_RE.search(race)
+        if not date_match or not pos_match:
+            continue
+        past_date = parse_date(date_match.group(1).strip())
+        if not past_date:
+            continue
+        course_match = RUN_COURSE_RE.search(race)
+        class_match = RUN_CLASS_RE.search(race)
+        distance_match = RUN_DISTANCE_RE.search(race)
+        going_match = RUN_GOING_RE.search(race)
+        or_match = RUN_OR_RE.search(race)
+        runs.append({
+            "date": past_date,
+            "course": course_match.group(1).strip().lower() if course_match else None,
+            "class": int(class_match.group(1)) if class_match else None,
+            "distance": parse_distance(distance_match.group(1).strip()) if distance_match else None,
+            "going": going_match.group(1).strip().lower() if going_match else None,
+            "official_rating": int(or_match.group(1)) if or_match else None,
+            "pos": float(pos_match.group(1)),
+            "runners": float(pos_match.group(2)),
+        })
+    return runs
+
+def run_score(run, today):
+    decay = math.exp(-(today - run["date"]).days / 180)
+    if run["runners"] > 1:
+        return (1 - (run["pos"] - 1) / (run["runners"] - 1)) * decay
+    return (1 if run["pos"] == 1 else 0) * decay
+
+def average_run_score(runs, today):
+    scores = [run_score(run, today) for run in runs]
     if scores:
         return sum(scores) / len(scores)
     return 0.5
 
+def within_distance(past_distance, todays_distance, tolerance=0.1):
+    return abs(past_distance - todays_distance) / todays_distance <= tolerance
+
+def parse_past_performance(past_history, race_date):
+    runs = parse_race_history(past_history)
+    if not runs:
+        return 0.5
+    today = parse_date(race_date) or datetime.now()
+    return average_run_score(runs, today)
+
 def parse_similar_performance(past_history, todays_course, todays_distance, todays_going, todays_class, race_date):
-    if not past_history or not todays_course or not todays_distance or not todays_going or not todays_class:
+    runs = parse_race_history(past_history)
+    if not runs or not todays_course or not todays_distance or not todays_going or not todays_class:
         return 0.5
-    parse_date(race_date)
-    races = re.split(r"\|\|\|\|", past_history)
-    scores = []
-    for race in races:
-        date_match = re.search(r"Date:\s*([^|]+)", race)
-        course_match = re.search(r"Course:\s*([^|]+)", race)
-        distance_match = re.search(r"Distance:\s*([^|]+)", race)
-        going_match = re.search(r"Going:\s*([^|]+)", race)
-        class_match = re.search(r"Class:\s*(\d+)", race)
-        pos_match = re.search(r"Position:\s*(\d+)\s*/\s*(\d+)", race)
-        if date_match and course_match and distance_match and going_match and class_match and pos_match:
-            past_date_str = date_match.group(1).strip()
-            past_course = course_match.group(1).strip().lower()
-            past_distance_str = distance_match.group(1).strip()
-            past_going = going_match.group(1).strip().lower()
-            past_class = int(class_match.group(1))
-            pos = float(pos_match.group(1))
-            total = float(pos_match.group(2))
-            past_date = parse_date(past_date_str)
-            past_distance = parse_distance(past_distance_str)
-            if past_date and past_course == todays_course.lower() and abs(past_distance - todays_distance) / todays_distance <= 0.1 and past_going == todays_going and past_class == todays_class:
-                days_ago = (today - past_date).days
-                decay = math.exp(-days_ago / 180)
-                if total > 1:
-                    score = (1 - (pos - 1) / (total - 1)) * decay
-                else:
-                    score = (1 if pos == 1 else 0) * decay
-                scores.append(score)
-    if scores:
-        return sum(scores) / len(scores)
-    return 0.5
+    today = parse_date(race_date) or datetime.now()
+    course = todays_course.lower()
+    similar = [
+        run for run in runs
+        if run["course"] == course and run["distance"] is not None and within_distance(run["distance"], todays_distance)
+        and run["going"] == todays_going and run["class"] == todays_class
+    ]
+    return average_run_score(similar, today)
+
+def course_factor(past_history, race_location, race_date):
+    runs = parse_race_history(past_history)
+    if not runs:
+        return 0.5
+    today = parse_date(race_date) or datetime.now()
+    course = race_location.lower()
+    return average_run_score([run for run in runs if run["course"] == course], today)
 
 def going_suitability(past_history, todays_going, race_date):
-    if not past_history or not todays_going:
+    runs = parse_race_history(past_history)
+    if not runs or not todays_going:
         return 0.5
     today = parse_date(race_date) or datetime.now()
-    races = re.split(r"\|\|\|\|", past_history)
-    scores = []
-    for race in races:
-        date_match = re.search(r"Date:\s*([^|]+)", race)
-        going_match = re.search(r"Going:\s*([^|]+)", race)
-        pos_match = re.search(r"Position:\s*(\d+)\s*/\s*(\d+)", race)
-        if date_match and going_match and pos_match:
-            past_date_str = date_match.group(1).strip()
-            past_going = going_match.group(1).strip().lower()
-            pos = float(pos_match.group(1))
-            total = float(pos_match.group(2))
-            past_date = parse_date(past_date_str)
-            if past_date and past_going == todays_going:
-                days_ago = (today - past_date).days
-                decay = math.exp(-days_ago / 180)
-                if total > 1:
-                    score = (1 - (pos - 1) / (total - 1)) * decay
-                else:
-                    score = (1 if pos == 1 else 0) * decay
-                scores.append(score)
-    if scores:
-        return sum(scores) / len(scores)
-    return 0.5
+    return average_run_score([run for run in runs if run["going"] == todays_going], today)
 
 def distance_suitability(past_history, todays_distance, race_date):
-    if not past_history or not todays_distance:
+    runs = parse_race_history(past_history)
+    if not runs or not todays_distance:
         return 0.5
     today = parse_date(race_date) or datetime.now()
-    races = re.split(r"\|\|\|\|", past_history)
-    scores = []
-    for race in races:
-        date_match = re.search(r"Date:\s*([^|]+)", race)
-        distance_match = re.search(r"Distance:\s*([^|]+)", race)
-        pos_match = re.search(r"Position:\s*(\d+)\s*/\s*(\d+)", race)
-        if date_match and distance_match and pos_match:
-            past_date_str = date_match.group(1).strip()
-            past_distance_str = distance_match.group(1).strip()
-            pos = float(pos_match.group(1))
-            total = float(pos_match.group(2))
-            past_date = parse_date(past_date_str)
-            past_distance = parse_distance(past_distance_str)
-            if past_date and past_distance and abs(past_distance - todays_distance) / todays_distance <= 0.1:
-                days_ago = (today - past_date).days
-                decay = math.exp(-days_ago / 180)
-                if total > 1:
-                    score = (1 - (pos - 1) / (total - 1)) * decay
-                else:
-                    score = (1 if pos == 1 else 0) * decay
-                scores.append(score)
-    if scores:
-        return sum(scores) / len(scores)
-    return 0.5
+    return average_run_score([run for run in runs if run["distance"] and within_distance(run["distance"], todays_distance)], today)
 
 def jockey_trainer_factor(past_history, race_date):
-    if not past_history:
+    runs = parse_race_history(past_history)
+    if not runs:
         return 0.5
     today = parse_date(race_date) or datetime.now()
-    races = re.split(r"\|\|\|\|", past_history)
-    scores = []
-    for race in races:
-        date_match = re.search(r"Date:\s*([^|]+)", race)
-        pos_match = re.search(r"Position:\s*(\d+)\s*/\s*(\d+)", race)
-        if date_match and pos_match:
-            past_date_str = date_match.group(1).strip()
-            pos = float(pos_match.group(1))
-            total = float(pos_match.group(2))
-            past_date = parse_date(past_date_str)
-            if past_date:
-                days_ago = (today - past_date).days
-                decay = math.exp(-days_ago / 180)
-                if total > 1:
-                    score = (1 - (pos - 1) / (total - 1)) * decay
-                else:
-                    score = (1 if pos == 1 else 0) * decay
-                scores.append(score)
-    if scores:
-        return sum(scores) / len(scores)
-    return 0.5
-
-def extract_stall(stall_str, total_runners):
-    if not isinstance(stall_str, str) or stall_str.strip() == "" or stall_str == "Unknown":
-        return 0.5  # Default for missing/invalid stall data
-    stall_str = stall_str.strip().lstrip("(").rstrip(")")
-    try:
-        stall = float(stall_str)
-        return 1 - (stall - 1) / (total_runners - 1) if total_runners > 1 else 0.5
-    except:
-        return 0.5  # Fallback for any parsing errors
+    return average_run_score(runs, today)
 
 def class_factor(past_history, todays_class, race_date):
-    if not past_history or not todays_class:
+    runs = parse_race_history(past_history)
+    if not runs or not todays_class:
         return 0.5
     today = parse_date(race_date) or datetime.now()
-    races = re.split(r"\|\|\|\|", past_history)
     same_class_scores = []
     higher_class_scores = []
     lower_class_scores = []
 
-    for race in races:
-        date_match = re.search(r"Date:\s*([^|]+)", race)
-        class_match = re.search(r"Class:\s*(\d+)", race)
-        pos_match = re.search(r"Position:\s*(\d+)\s*/\s*(\d+)", race)
-        if date_match and class_match and pos_match:
-            past_date_str = date_match.group(1).strip()
-            past_class = int(class_match.group(1))
-            pos = float(pos_match.group(1))
-            total = float(pos_match.group(2))
-            past_date = parse_date(past_date_str)
-            if past_date and total > 1:
-                days_ago = (today - past_date).days
-                decay = math.exp(-days_ago / 180)
-                score = (1 - (pos - 1) / (total - 1)) * decay  # Normalized position with recency decay
-                if past_class == todays_class:
-                    same_class_scores.append(score)
-                elif past_class < todays_class:  # Higher class (lower number)
-                    higher_class_scores.append(score)
-                elif past_class > todays_class:  # Lower class (higher number)
-                    lower_class_scores.append(score)
+    for run in runs:
+        if run["class"] is None or run["runners"] <= 1:
+            continue
+        score = run_score(run, today)  # Normalized position with recency decay
+        if run["class"] == todays_class:
+            same_class_scores.append(score)
+        elif run["class"] < todays_class:  # Higher class (lower number)
+            higher_class_scores.append(score)
+        else:  # Lower class (higher number)
+            lower_class_scores.append(score)
 
     # Base score: Performance in same class
     base_score = sum(same_class_scores) / len(same_class_scores) if same_class_scores else 0.5
@@ -610,14 +937,11 @@ def calculate_composite_score(row, weights, field_stats, todays_course, todays_d
     odds_fractional = str(row["Odds"]).strip().strip("'")
     odds_numeric = parse_fractional_odds(odds_fractional)
     odds_factor = 1 / odds_numeric if odds_numeric and odds_numeric > 0 else 0
-    try:
-        official_rating = float(row["Official Rating"])
-        official_rating_factor = official_rating / 100
-    except:
-        official_rating_factor = 0
+    official_rating_factor_val = official_rating_factor(row["Official Rating"])
 
-    past_perf = parse_past_performance(row["Past Race History"], row["Race Date"])
-    similar_perf = parse_similar_performance(row["Past Race History"], todays_course, todays_distance, todays_going, todays_class, row["Race Date"])
+    history = parse_race_history(row["Past Race History"])
+    past_perf = parse_past_performance(history, row["Race Date"])
+    similar_perf = parse_similar_performance(history, todays_course, todays_distance, todays_going, todays_class, row["Race Date"])
     stall_factor_val = extract_stall(row["Stall"], total_runners)
     headgear_factor_val = parse_headgear_factor(row["Headgear"], row["Comments"])
     age_factor_val = age_factor(row["Age"], optimal=7, std=3)
@@ -627,14 +951,14 @@ def calculate_composite_score(row, weights, field_stats, todays_course, todays_d
     weight_field_factor_val = weight_factor(row["Weight"], avg_weight)
     recent_form_factor_val = recent_form_factor(row["Recent Form"])
     comments_factor_val = comments_sentiment_factor(row["Comments"])
-    course_factor_val = course_factor(row["Past Race History"], row["Race Location"], row["Race Date"])
-    going_suit = going_suitability(row["Past Race History"], todays_going, row["Race Date"])
-    distance_suit = distance_suitability(row["Past Race History"], todays_distance, row["Race Date"])
-    jt_factor = jockey_trainer_factor(row["Past Race History"], row["Race Date"])
-    class_factor_val = class_factor(row["Past Race History"], todays_class, row["Race Date"])
+    course_factor_val = course_factor(history, row["Race Location"], row["Race Date"])
+    going_suit = going_suitability(history, todays_going, row["Race Date"])
+    distance_suit = distance_suitability(history, todays_distance, row["Race Date"])
+    jt_factor = jockey_trainer_factor(history, row["Race Date"])
+    class_factor_val = class_factor(history, todays_class, row["Race Date"])
 
     score = (weights["odds"] * odds_factor) + \
-            (weights["official_rating"] * official_rating_factor) + \
+            (weights["official_rating"] * official_rating_factor_val) + \
             (weights["past_performance"] * past_perf) + \
             (weights["similar_conditions"] * similar_perf) + \
             (weights["stall"] * stall_factor_val) + \
@@ -682,20 +1006,14 @@ def input_custom_weights():
 # Additional Helper Functions
 ##############################
 def compute_field_stats(df):
-    weights = []
-    ages = []
-    for idx, row in df.iterrows():
-        w = parse_weight_to_lbs(row["Weight"])
-        if w and not np.isnan(w):
-            weights.append(w)
-        try:
-            a = float(row["Age"])
-            ages.append(a)
-        except:
-            pass
-    avg_weight = sum(weights) / len(weights) if weights else 0
-    avg_age = sum(ages) / len(ages) if ages else 0
-    race_distance = get_todays_distance(df.iloc[0]["Race Type Data"])
+    weights = weights_lbs_array(df["Weight"])
+    weights = weights[(weights != 0) & ~np.isnan(weights)]
+    ages, age_ok = _float_array(df["Age"].tolist())
+    ages = ages[age_ok]
+    # Python sums over the kept values, so the averages match the row-by-row version exactly.
+    avg_weight = sum(weights.tolist()) / len(weights) if len(weights) else 0
+    avg_age = sum(ages.tolist()) / len(ages) if len(ages) else 0
+    race_distance = get_todays_distance(df["Race Type Data"].iat[0])
     if race_distance is None or race_distance <= 0:
         race_distance = 5000
     return {"avg_weight": avg_weight, "avg_age": avg_age, "race_distance": race_distance}
@@ -712,131 +1030,486 @@ def get_race_type(race_name):
         return "Other"
 
 ##############################
-# Main Modeling Functions
+# Vectorized Scoring Engine
 ##############################
-def model_race(csv_filename, weights):
-    import pandas as pd
-    from fractions import Fraction
-    from streamlitmodel import calculate_composite_score, compute_field_stats, get_todays_distance, get_todays_going, parse_class_from_race_type, parse_fractional_odds_to_decimal
-
-    odds_ladder = [
-        '1/1000', '1/500', '1/200', '1/100', '1/66', '1/50', '1/40', '1/33', '1/25', '1/20',
-        '1/16', '1/14', '1/12', '1/10', '1/9', '1/8', '1/7', '1/6', '1/5', '2/9',
-        '1/4', '2/7', '3/10', '1/3', '4/11', '2/5', '4/9', '1/2', '8/15', '4/7',
-        '8/13', '4/6', '8/11', '4/5', '5/6', '10/11', 'Evs', '11/10', '6/5', '5/4',
-        '11/8', '7/5', '6/4', '13/8', '15/8', '7/4', '2/1', '9/4', '5/2', '11/4',
-        '3/1', '10/3', '7/2', '4/1', '9/2', '5/1', '11/2', '6/1', '13/2', '7/1',
-        '15/2', '8/1', '9/1', '10/1', '12/1', '14/1', '16/1', '18/1', '20/1', '25/1',
-        '33/1', '40/1', '50/1', '66/1', '100/1', '150/1', '200/1', '250/1', '500/1', '1000/1'
-    ]
+FACTOR_NAMES = [
+    "odds", "official_rating", "past_performance", "similar_conditions", "stall", "headgear", "age",
+    "last_ran", "weight_field", "recent_form", "comments", "course", "going_suitability",
+    "distance_suitability", "jockey_trainer", "class"
+]
+
+# The weights the command line and the Streamlit app start from.
+DEFAULT_WEIGHTS = {
+    "odds": 40,
+    "official_rating": 10,
+    "past_performance": 45,
+    "similar_conditions": 50,
+    "stall": 5,
+    "headgear": 5,
+    "age": 5,
+    "last_ran": 40,
+    "weight_field": 20,
+    "recent_form": 20,
+    "comments": 10,
+    "course": 20,
+    "going_suitability": 20,
+    "distance_suitability": 20,
+    "jockey_trainer": 20,
+    "class": 20
+}
+
+PAST_RUN_COLUMNS = ["runner", "date", "course", "class", "distance", "going", "official_rating", "pos", "runners"]
+
+DAY_NS = np.int64(86_400 * 10**9)
+
+def build_past_runs(histories):
+    # Long table of every past run in the field; "runner" is the row position of the horse in the race card.
+    columns = {col: [] for col in PAST_RUN_COLUMNS}
+    for runner, past_history in enumerate(_values(histories)):
+        for run in parse_race_history(past_history):
+            columns["runner"].append(runner)
+            for col in PAST_RUN_COLUMNS[1:]:
+                columns[col].append(run[col])
+    # Typed arrays straight from the parsed values, rather than a records frame cast column by column.
+    return pd.DataFrame({
+        "runner": np.array(columns["runner"], dtype=np.int64),
+        "date": np.array(columns["date"], dtype="datetime64[ns]"),
+        "course": columns["course"] or np.array([], dtype=object),
+        "class": np.array(columns["class"], dtype=float),
+        "distance": np.array(columns["distance"], dtype=float),
+        "going": columns["going"] or np.array([], dtype=object),
+        "official_rating": np.array(columns["official_rating"], dtype=float),
+        "pos": np.array(columns["pos"], dtype=float),
+        "runners": np.array(columns["runners"], dtype=float),
+    })
+
+def race_conditions(df):
+    race_type_data = df["Race Type Data"].iat[0]
+    return {
+        "course": df["Race Location"].iat[0],
+        "distance": get_todays_distance(race_type_data),
+        "going": get_todays_going(race_type_data),
+        "class": parse_class_from_race_type(race_type_data),
+        "total_runners": len(df),
+        "field_stats": compute_field_stats(df),
+    }
 
-    def find_closest_odds(prob):
-        if prob <= 0:
-            return "1000/1"
-        def odds_to_fraction(o):
-            o = o.lower()
-            if o in ['evs', 'evens']:
-                o = '1/1'
-            try:
-                return Fraction(o)
-            except:
-                return Fraction(1000, 1)
-        best_odds = min(odds_ladder, key=lambda o: abs((1 / (odds_to_fraction(o) + 1)) - prob))
-        return best_odds
+def weights_vector(weights):
+    return np.array([weights[name] for name in FACTOR_NAMES], dtype=float)
 
-    df = pd.read_csv(csv_filename)
-    df.columns = df.columns.str.strip().str.title()
+def composite_scores(factors, weights):
+    return factors.to_numpy() @ weights_vector(weights)
+
+def official_rating_factor(official_rating):
+    try:
+        return float(official_rating) / 100
+    except:
+        return 0
+
+def official_rating_factors(ratings):
+    ratings, ok = _float_array(_values(ratings))
+    return np.where(ok, ratings / 100, 0.0)
+
+def stall_factors(stalls, total_runners):
+    stalls, ok = _float_array([s.strip().lstrip("(").rstrip(")") if isinstance(s, str) else None for s in _values(stalls)])
+    if total_runners <= 1:
+        return np.full(len(stalls), 0.5)
+    return np.where(ok, 1 - (stalls - 1) / (total_runners - 1), 0.5)
+
+def weights_lbs_array(weights):
+    # parse_weight_to_lbs for each runner: "st-lb" strings to pounds, NaN where unreadable.
+    return np.array([parse_weight_to_lbs(weight) for weight in _values(weights)], dtype=float)
+
+def weight_field_factors(weights, avg_weight):
+    weights = weights_lbs_array(weights)
+    if avg_weight <= 0:
+        return np.full(len(weights), 0.5)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(weights != 0, np.power(avg_weight / weights, 0.5), 0.5)
+
+def _text_array(values, default=""):
+    # Lower-cased strings for np.char searches; anything that is not a string becomes `default`.
+    return np.array([value.lower().strip() if isinstance(value, str) else default for value in values], dtype=str)
+
+def headgear_factors(headgear, comments):
+    gear = _text_array(_values(headgear), default="none")
+    notes = _text_array(_values(comments))
+    has = lambda text, word: np.char.find(text, word) >= 0
+    blinkers, visor, hood = has(gear, "blinkers"), has(gear, "visor"), has(gear, "hood")
+    bonus = np.where(blinkers, 0.10, 0.0) + np.where(visor, 0.05, 0.0) + np.where(hood, 0.07, 0.0)
+    bonus = np.where(bonus == 0.0, 0.03, bonus)
+    # Only the first matching first-time note counts, as in parse_headgear_factor's elif chain.
+    first_time = has(notes, "first-time")
+    bonus = bonus + np.select(
+        [first_time & has(notes, "blinkers") & blinkers, first_time & has(notes, "visor") & visor, first_time & has(notes, "hood") & hood],
+        [0.05, 0.03, 0.04], 0.0)
+    return np.where((gear == "none") | (gear == ""), 0.0, bonus)
+
+FORM_TOKEN_RE = re.compile(r"[\s,-]+")
+
+def recent_form_factors(forms):
+    # recent_form_factor over a flat token table: each runner's form tokens newest first, scored
+    # and weighted 1/(i+1) by their place in the string, then summed per runner with bincount.
+    forms = _values(forms)
+    runner, place, tokens = [], [], []
+    for i, form in enumerate(forms):
+        if not isinstance(form, str) or form.lower().strip() in ["", "no form available"]:
+            continue
+        for k, token in enumerate(reversed(FORM_TOKEN_RE.split(form.strip()))):
+            runner.append(i)
+            place.append(k)
+            tokens.append(token)
+    runner = np.array(runner, dtype=np.int64)
+    tokens = np.array(tokens, dtype=str)
+    digits = np.char.isdigit(tokens)
+    falls = np.isin(np.char.upper(tokens), ["F", "U", "P"])
+    pos = np.zeros(len(tokens), dtype=np.int64)
+    pos[digits] = tokens[digits].astype(np.int64)
+    scores = np.where(digits, np.select([pos == 1, pos <= 3, pos <= 8], [1.0, 0.5, 0.25], -0.5), -2.0)
+    scored = digits | falls
+    weighted = scores[scored] * (1 / (np.array(place, dtype=float)[scored] + 1))
+    counts = np.bincount(runner[scored], minlength=len(forms))
+    totals = np.bincount(runner[scored], weights=weighted, minlength=len(forms))
+    # Sum of 1/(i+1) over the first `count` places, the divisor recent_form_factor uses.
+    harmonic = np.concatenate([[0.0], np.cumsum(1 / np.arange(1, counts.max(initial=0) + 1))])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts > 0, 1 + 0.2 * (totals / harmonic[counts]), 0.5)
+
+def odds_factors(odds):
+    odds_numeric = fractional_odds_array(odds)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(odds_numeric > 0, 1 / odds_numeric, 0)
+
+def _values(column):
+    # A column as a plain list; iterating a pandas Series value by value is far slower.
+    return column.tolist() if hasattr(column, "tolist") else list(column)
+
+def _float_array(values):
+    # float() semantics per value; the mask marks values float() could not parse.
+    out = np.full(len(values), np.nan)
+    ok = np.zeros(len(values), dtype=bool)
+    for i, value in enumerate(values):
+        try:
+            out[i] = float(value)
+            ok[i] = True
+        except:
+            pass
+    return out, ok
+
+def _runner_mean(scores, mask, runner, n_runners, default=0.5):
+    counts = np.bincount(runner[mask], minlength=n_runners)
+    sums = np.bincount(runner[mask], weights=scores[mask], minlength=n_runners)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts > 0, sums / counts, default)
+
+def history_factor_arrays(runs, n_runners, race_dates, race_locations, conditions, as_of=None):
+    # Recency decay is measured back from as_of when given, otherwise from each runner's race date
+    # (or now, when that cannot be parsed).
+    if as_of is not None:
+        today = np.full(n_runners, np.datetime64(as_of, "ns")).astype(np.int64)
+    else:
+        now = datetime.now()
+        today = np.array([parse_date(d) or now for d in _values(race_dates)], dtype="datetime64[ns]").astype(np.int64)
+    runner = runs["runner"].to_numpy()
+    dates = runs["date"].to_numpy().astype(np.int64)
+    days_ago = (today[runner] - dates) // DAY_NS
+    decay = np.exp(-days_ago / 180)
+
+    pos = runs["pos"].to_numpy()
+    field = runs["runners"].to_numpy()
+    with np.errstate(invalid="ignore", divide="ignore"):
+        normalised = np.where(field > 1, 1 - (pos - 1) / (field - 1), (pos == 1).astype(float))
+    scores = normalised * decay
+
+    course = runs["course"].to_numpy(dtype=object)
+    going = runs["going"].to_numpy(dtype=object)
+    race_class = runs["class"].to_numpy()
+    distance = runs["distance"].to_numpy()
+    everything = np.ones(len(runs), dtype=bool)
+
+    locations = np.array([loc.lower() if isinstance(loc, str) else None for loc in _values(race_locations)], dtype=object)
+    course_mask = course == locations[runner]
+
+    todays_course, todays_distance = conditions["course"], conditions["distance"]
+    todays_going, todays_class = conditions["going"], conditions["class"]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        distance_mask = np.abs(distance - todays_distance) / todays_distance <= 0.1 if todays_distance else ~everything
+    going_mask = going == todays_going
+
+    factors = {
+        "past_performance": _runner_mean(scores, everything, runner, n_runners),
+        "jockey_trainer": _runner_mean(scores, everything, runner, n_runners),
+        "course": _runner_mean(scores, course_mask, runner, n_runners),
+        "going_suitability": np.full(n_runners, 0.5),
+        "distance_suitability": np.full(n_runners, 0.5),
+        "similar_conditions": np.full(n_runners, 0.5),
+        "class": np.full(n_runners, 0.5),
+    }
+    if todays_going:
+        factors["going_suitability"] = _runner_mean(scores, going_mask, runner, n_runners)
+    if todays_distance:
+        factors["distance_suitability"] = _runner_mean(scores, distance_mask & (distance != 0), runner, n_runners)
+    if todays_course and todays_distance and todays_going and todays_class:
+        similar_mask = (course == todays_course.lower()) & distance_mask & going_mask & (race_class == todays_class)
+        factors["similar_conditions"] = _runner_mean(scores, similar_mask, runner, n_runners)
+    if todays_class:
+        classed = ~np.isnan(race_class) & (field > 1)
+        base = _runner_mean(scores, classed & (race_class == todays_class), runner, n_runners)
+        higher_mask = classed & (race_class < todays_class)
+        lower_mask = classed & (race_class > todays_class)
+        higher = _runner_mean(scores, higher_mask, runner, n_runners, default=np.nan)
+        lower = _runner_mean(scores, lower_mask, runner, n_runners, default=np.nan)
+        adjustment = np.where(np.isnan(higher), 0, 0.5 * higher) - np.where(np.isnan(lower), 0, 0.25 * (1 - lower))
+        factors["class"] = np.clip(base + adjustment, 0.0, 1.0)
+    return factors
+
+def compute_factor_matrix(df, past_runs=None, conditions=None, history_store=None, connection_stats=None, as_of=None):
+    # One column per entry of FACTOR_NAMES, one row per runner, in df's row order. With a
+    # RaceHistoryStore the history factors also see every stored run for the card's horses; with
+    # ConnectionStats the jockey_trainer factor comes from the runner's jockey/trainer record.
+    # connection_stats=None uses the shared store (unless CONNECTION_STATS=off), False leaves it out.
+    # as_of (a datetime) pins the day the form is judged from, e.g. the race day in a replay.
+    conditions = conditions or race_conditions(df)
+    n_runners = len(df)
+    field_stats = conditions["field_stats"]
+    if past_runs is None:
+        with span("factor.parse_history"):
+            past_runs = build_past_runs(df["Past Race History"] if "Past Race History" in df.columns else [])
+    if history_store is not None:
+        with span("factor.history_store"):
+            past_runs = history_store.past_runs_for_card(df, past_runs)
+
+    def age_values():
+        ages, age_ok = _float_array(df["Age"].tolist())
+        return np.where(age_ok, np.exp(-((ages - 7) ** 2) / (2 * (3 ** 2))), 0.5)
+
+    def last_ran_values():
+        race_distance = field_stats.get("race_distance", 5000)
+        last_ran, last_ran_ok = _float_array(df["Last Ran (Days)"].tolist())
+        if race_distance > 0:
+            baseline = 10 * (race_distance / 5000)
+            rested = np.where(last_ran >= baseline, np.exp(-(last_ran - baseline) / baseline), 1 + ((baseline - last_ran) / baseline) * 0.5)
+            return np.where(last_ran_ok, rested, 1.0)
+        return np.ones(n_runners)
+
+    avg_weight = field_stats.get("avg_weight", 0)
+    runner_factors = {
+        "odds": lambda: odds_factors(df["Odds"]),
+        "official_rating": lambda: official_rating_factors(df["Official Rating"]),
+        "stall": lambda: stall_factors(df["Stall"], conditions["total_runners"]),
+        "headgear": lambda: headgear_factors(df["Headgear"], df["Comments"]),
+        "age": age_values,
+        "last_ran": last_ran_values,
+        "weight_field": lambda: weight_field_factors(df["Weight"], avg_weight),
+        "recent_form": lambda: recent_form_factors(df["Recent Form"]),
+        "comments": lambda: comments_sentiment_factors(df["Comments"]),
+    }
+    factors = {}
+    for name, compute in runner_factors.items():
+        with span(f"factor.{name}"):
+            factors[name] = compute()
+    # The history factors share one pass over the past-run table, so they are timed together.
+    with span("factor.history", runs=len(past_runs)):
+        factors.update(history_factor_arrays(past_runs, n_runners, df["Race Date"], df["Race Location"], conditions, as_of=as_of))
+    connection_stats = connection_stats_store() if connection_stats is None else connection_stats
+    if connection_stats:
+        with span("factor.connections"):
+            connections = connection_stats.connection_factors(df, as_of=as_of)
+        factors["jockey_trainer"] = np.where(np.isnan(connections), factors["jockey_trainer"], connections)
+    return pd.DataFrame({name: np.asarray(factors[name], dtype=float) for name in FACTOR_NAMES}, index=df.index)
 
-    if "Composite Score" not in df.columns:
-        df_sorted = df.copy().reset_index(drop=True)
-        total_runners = len(df_sorted)
-        todays_course = df_sorted.loc[0, "Race Location"]
-        todays_race_type_data = df_sorted.loc[0, "Race Type Data"]
-        todays_distance = get_todays_distance(todays_race_type_data)
-        todays_going = get_todays_going(todays_race_type_data)
-        todays_class = parse_class_from_race_type(todays_race_type_data)
-        field_stats = compute_field_stats(df_sorted)
-
-        df_sorted["Composite Score"] = df_sorted.apply(
-            lambda row: calculate_composite_score(row, weights, field_stats, todays_course, todays_distance, todays_going, todays_class, total_runners),
-            axis=1
-        )
+##############################
+# Race Card Files
+##############################
+RUN_TABLE_TYPES = {"class": "Int8", "distance": "Int32", "official_rating": "Int16", "pos": "Int16", "runners": "Int16"}
+
+def past_runs_filename(filename):
+    stem, ext = os.path.splitext(filename)
+    return f"{stem}_runs{ext}"
+
+def save_race_card(df, filename, past_runs=None):
+    # Runner fields go to `filename` as Feather; the past runs go to a typed child table beside it
+    # (see past_runs_filename) keyed by runner position, instead of the pipe-joined history string.
+    df = df.reset_index(drop=True)
+    if past_runs is None:
+        past_runs = build_past_runs(df["Past Race History"])
+    runs = past_runs.astype(RUN_TABLE_TYPES)
+    runs["runner"] = runs["runner"].astype("int32")
+    runs.insert(1, "horse", df["Horse Name"].to_numpy()[runs["runner"].to_numpy()] if len(runs) else pd.Series([], dtype=object))
+    df.drop(columns=["Past Race History"], errors="ignore").to_feather(filename)
+    runs.to_feather(past_runs_filename(filename))
+    return filename
+
+def load_race_card_tables(race):
+    # Returns (runners, past_runs). Feather cards are memory-mapped and come with their child table,
+    # a (runners, past_runs) tuple (e.g. CompactRaceCards.card) is passed through; DataFrames and
+    # CSVs return past_runs=None and are parsed from "Past Race History" when scored.
+    past_runs = None
+    if isinstance(race, tuple):
+        df, past_runs = race[0].copy(), race[1]
+    elif isinstance(race, pd.DataFrame):
+        df = race.copy()
+    elif str(race).endswith(".feather"):
+        import pyarrow.feather as feather
+        df = feather.read_table(race, memory_map=True).to_pandas()
+        runs_filename = past_runs_filename(str(race))
+        if os.path.exists(runs_filename):
+            runs = feather.read_table(runs_filename, memory_map=True).to_pandas()
+            past_runs = runs[PAST_RUN_COLUMNS].astype({col: float for col in RUN_TABLE_TYPES})
+            past_runs["runner"] = past_runs["runner"].astype(np.int64)
     else:
-        df_sorted = df.copy().reset_index(drop=True)
-
-    df_sorted = df_sorted.sort_values(by="Composite Score", ascending=False).reset_index(drop=True)
-    df_sorted["MV"] = df_sorted["Composite Score"].round(0).astype(int)
-
-    # Setup for odds conversion and calibration
-    ladder_decimal = [parse_fractional_odds_to_decimal(odds) for odds in odds_ladder]
-    real_odds = df_sorted["Odds"].apply(lambda x: x.strip("'"))
-    bookie_probs = [1 / parse_fractional_odds_to_decimal(odd) for odd in real_odds]
-    bookie_overround = sum(bookie_probs)
-
-    mv_ranks = df_sorted["Composite Score"].rank(ascending=False, method='min')
-    total_horses = len(df_sorted)
-    max_steps = 8
-
-    modeled_odds_decimal = []
-    modeled_odds_fractional = []
-    real_odds_indices = []
-    modeled_odds_indices = []
-    for idx, row in df_sorted.iterrows():
-        real_odd = row["Odds"].strip("'")
-        real_odd_decimal = parse_fractional_odds_to_decimal(real_odd)
-        closest_idx = min(range(len(ladder_decimal)), key=lambda i: abs(ladder_decimal[i] - real_odd_decimal))
-        real_odds_indices.append(closest_idx)
-
-        rank = mv_ranks[idx]
-        relative_position = (total_horses - rank + 2) / total_horses
-        steps = int(round((relative_position - 0.5) * 2 * max_steps))
-        new_idx = closest_idx - steps
-        new_idx = max(0, min(len(odds_ladder) - 2, new_idx))
-
-        modeled_odd_decimal = ladder_decimal[new_idx]
-        modeled_odd_fractional = odds_ladder[new_idx]
-        modeled_odds_decimal.append(modeled_odd_decimal)
-        modeled_odds_fractional.append(modeled_odd_fractional)
-        modeled_odds_indices.append(new_idx)
-
-    df_sorted["Modelled Odds"] = modeled_odds_decimal
-    df_sorted["Modelled Odds Fraction"] = modeled_odds_fractional
-
-    modeled_probs = [1 / odd for odd in modeled_odds_decimal]
-    modeled_overround = sum(modeled_probs)
-    calibration_factor = bookie_overround / modeled_overround
-    calibrated_probs = [prob * calibration_factor for prob in modeled_probs]
-    calibrated_modeled_odds = [1 / prob for prob in calibrated_probs]
-    df_sorted["Calibrated Modelled Odds"] = calibrated_modeled_odds
-
-    calibrated_fraction_odds = []
-    calibrated_fraction_indices = []
-    for calibrated_odd in calibrated_modeled_odds:
-        closest_idx = min(range(len(ladder_decimal)), key=lambda i: abs(ladder_decimal[i] - calibrated_odd))
-        calibrated_fraction_odds.append(odds_ladder[closest_idx])
-        calibrated_fraction_indices.append(closest_idx)
-    df_sorted["Calibrated Fraction Odds"] = calibrated_fraction_odds
+        df = pd.read_csv(race)
+    df.columns = df.columns.str.strip().str.title()
+    return df, past_runs
+
+##############################
+# Odds Ladder and Pricing
+##############################
+ODDS_LADDER = [
+    '1/1000', '1/500', '1/200', '1/100', '1/66', '1/50', '1/40', '1/33', '1/25', '1/20',
+    '1/16', '1/14', '1/12', '1/10', '1/9', '1/8', '1/7', '1/6', '1/5', '2/9',
+    '1/4', '2/7', '3/10', '1/3', '4/11', '2/5', '4/9', '1/2', '8/15', '4/7',
+    '8/13', '4/6', '8/11', '4/5', '5/6', '10/11', 'Evs', '11/10', '6/5', '5/4',
+    '11/8', '7/5', '6/4', '13/8', '15/8', '7/4', '2/1', '9/4', '5/2', '11/4',
+    '3/1', '10/3', '7/2', '4/1', '9/2', '5/1', '11/2', '6/1', '13/2', '7/1',
+    '15/2', '8/1', '9/1', '10/1', '12/1', '14/1', '16/1', '18/1', '20/1', '25/1',
+    '33/1', '40/1', '50/1', '66/1', '100/1', '150/1', '200/1', '250/1', '500/1', '1000/1'
+]
+
+# Built once at import. The ladder is not quite in price order (15/8 sits before 7/4), so
+# nearest-price lookups binary-search a sorted copy and map back to ladder indices.
+LADDER_LABELS = np.array(ODDS_LADDER, dtype=object)
+LADDER_DECIMAL = np.array([parse_fractional_odds_to_decimal(odds) for odds in ODDS_LADDER])
+LADDER_PROBABILITY = 1 / LADDER_DECIMAL
+LADDER_ORDER = np.argsort(LADDER_DECIMAL, kind="stable")
+LADDER_SORTED = LADDER_DECIMAL[LADDER_ORDER]
+
+MAX_LADDER_STEPS = 8
+
+def closest_ladder_indices(decimal_odds):
+    # Ladder index of the nearest price for every value; ties go to the earlier ladder entry,
+    # as a min() over the ladder would pick.
+    decimal_odds = np.asarray(decimal_odds, dtype=float)
+    upper = np.clip(np.searchsorted(LADDER_SORTED, decimal_odds), 1, len(LADDER_SORTED) - 1)
+    lower = upper - 1
+    upper_distance = np.abs(LADDER_SORTED[upper] - decimal_odds)
+    lower_distance = np.abs(decimal_odds - LADDER_SORTED[lower])
+    upper_index, lower_index = LADDER_ORDER[upper], LADDER_ORDER[lower]
+    closer_upper = (upper_distance < lower_distance) | ((upper_distance == lower_distance) & (upper_index < lower_index))
+    return np.where(np.isnan(decimal_odds), 0, np.where(closer_upper, upper_index, lower_index))
+
+def fractional_odds_array(odds):
+    # parse_fractional_odds over a whole column.
+    return np.array([parse_fractional_odds(str(odd)) for odd in _values(odds)], dtype=float)
+
+def price_scores(scores, odds):
+    # scores is (weight sets x runners); odds are the bookmaker prices for the same runners.
+    scores = np.atleast_2d(np.asarray(scores, dtype=float))
+    total_horses = scores.shape[1]
+    real_decimal = fractional_odds_array(odds) + 1
+    bookie_overround = np.sum(1 / real_decimal)
+    real_indices = closest_ladder_indices(real_decimal)
+
+    ranks = 1 + (scores[:, None, :] > scores[:, :, None]).sum(axis=2)
+    relative_position = (total_horses - ranks + 2) / total_horses
+    steps = np.round((relative_position - 0.5) * 2 * MAX_LADDER_STEPS).astype(np.int64)
+    modelled_indices = np.clip(real_indices[None, :] - steps, 0, len(ODDS_LADDER) - 2)
+
+    modelled_odds = LADDER_DECIMAL[modelled_indices]
+    modelled_probs = LADDER_PROBABILITY[modelled_indices]
+    calibration_factor = bookie_overround / modelled_probs.sum(axis=1, keepdims=True)
+    calibrated_odds = 1 / (modelled_probs * calibration_factor)
+    calibrated_indices = closest_ladder_indices(calibrated_odds)
+
+    steps_shortened = real_indices[None, :] - calibrated_indices
+    value = np.where(steps_shortened >= 4, "💰", np.where(-steps_shortened >= 4, "✖️", ""))
+    return {
+        "bookie_overround": bookie_overround,
+        "real_indices": real_indices,
+        "modelled_indices": modelled_indices,
+        "modelled_odds": modelled_odds,
+        "calibrated_odds": calibrated_odds,
+        "calibrated_indices": calibrated_indices,
+        "value": value,
+    }
+
+##############################
+# Weight Sweeps
+##############################
+def weights_matrix(weight_sets):
+    if isinstance(weight_sets, dict):
+        weight_sets = [weight_sets]
+    if isinstance(weight_sets, pd.DataFrame):
+        return weight_sets[FACTOR_NAMES].to_numpy(dtype=float)
+    if isinstance(weight_sets, np.ndarray):
+        return np.atleast_2d(weight_sets).astype(float)
+    return np.array([weights_vector(weights) for weights in weight_sets], dtype=float).reshape(-1, len(FACTOR_NAMES))
+
+def sweep_weights(race, weight_sets, factors=None, history_store=None, connection_stats=None):
+    # Scores one race under every weight set with a single matrix multiply. weight_sets may be a list of
+    # weight dicts, a DataFrame with FACTOR_NAMES columns or an (N x 16) array in FACTOR_NAMES order.
+    df, past_runs = load_race_card_tables(race)
+    df = df.reset_index(drop=True)
+    if factors is None:
+        factors = compute_factor_matrix(df, past_runs, history_store=history_store, connection_stats=connection_stats)
+    scores = weights_matrix(weight_sets) @ factors.to_numpy().T
+    pricing = price_scores(scores, df["Odds"])
+
+    n_sets, n_runners = scores.shape
+    order = np.argsort(-scores, axis=1, kind="stable")
+    rows = np.arange(n_sets)[:, None]
+    return pd.DataFrame({
+        "Weight Set": np.repeat(np.arange(n_sets), n_runners),
+        "Rank": np.tile(np.arange(1, n_runners + 1), n_sets),
+        "Horse Name": df["Horse Name"].to_numpy()[order].ravel(),
+        "Odds": df["Odds"].to_numpy()[order].ravel(),
+        "CFO": LADDER_LABELS[pricing["calibrated_indices"][rows, order]].ravel(),
+        "MV": np.round(scores[rows, order]).astype(int).ravel(),
+        "Value": pricing["value"][rows, order].ravel(),
+        "Calibrated Modelled Odds": pricing["calibrated_odds"][rows, order].ravel(),
+    })
+
+##############################
+# Main Modeling Functions
+##############################
+def priced_output(df):
+    # Ranks a race by "Composite Score", moves each price along the ladder by rank and calibrates back
+    # to the bookmaker overround. Returns the Horse Name/Odds/CFO/MV/Value table and the raw pricing.
+    df_sorted = df.sort_values(by="Composite Score", ascending=False).reset_index(drop=True)
+    pricing = price_scores(df_sorted["Composite Score"].to_numpy(), df_sorted["Odds"])
 
     output_df = df_sorted[["Horse Name", "Odds", "Composite Score"]].copy()
     output_df["Composite Score"] = output_df["Composite Score"].round(0).astype(int)
     output_df = output_df.rename(columns={"Composite Score": "MV"})
-    output_df["CFO"] = df_sorted["Calibrated Fraction Odds"]
-
-    def flag_value(row, real_idx, calibrated_idx):
-        steps_shortened = real_idx - calibrated_idx
-        steps_worsened = calibrated_idx - real_idx
-        if steps_shortened >= 4:
-            return "💰"
-        elif steps_worsened >= 4:
-            return "✖️"
-        return ""
-
-    output_df["Value"] = [
-        flag_value(row, real_odds_indices[i], calibrated_fraction_indices[i])
-        for i, row in output_df.iterrows()
-    ]
+    output_df["CFO"] = LADDER_LABELS[pricing["calibrated_indices"][0]]
+    output_df["Value"] = pricing["value"][0]
+    return output_df[["Horse Name", "Odds", "CFO", "MV", "Value"]], pricing
+
+def load_race_card(race):
+    return load_race_card_tables(race)[0]
+
+def score_race(race_card, weights, history_store=None, connection_stats=None):
+    # model_race without the console table: returns the output table and the raw pricing.
+    with span("model_race"), profiled("model_race"):
+        with span("race_card.load"):
+            df, past_runs = load_race_card_tables(race_card)
+
+        if "Composite Score" not in df.columns:
+            df_sorted = df.copy().reset_index(drop=True)
+            with span("factor_matrix", runners=len(df_sorted)):
+                factors = compute_factor_matrix(df_sorted, past_runs, history_store=history_store, connection_stats=connection_stats)
+            with span("composite"):
+                df_sorted["Composite Score"] = composite_scores(factors, weights)
+        else:
+            df_sorted = df.copy().reset_index(drop=True)
+
+        with span("calibration"):
+            return priced_output(df_sorted)
 
-    output_df = output_df[["Horse Name", "Odds", "CFO", "MV", "Value"]]
+def model_race(race_card, weights, history_store=None, connection_stats=None):
+    output_df, pricing = score_race(race_card, weights, history_store=history_store, connection_stats=connection_stats)
+    bookie_overround = pricing["bookie_overround"]
+    calibrated_modeled_odds = pricing["calibrated_odds"][0]
 
     # Print results to console
     print("\n=== Modelled Predictions ===")
@@ -854,44 +1527,178 @@ def model_race(csv_filename, weights):
 
 
 
+##############################
+# Live Odds Re-pricing
+##############################
+def prepare_repricing(race_card, weights, url=None, history_store=None, connection_stats=None):
+    # Scores everything except the odds factor once; reprice_race then only needs new prices.
+    df, past_runs = load_race_card_tables(race_card)
+    df = df.reset_index(drop=True)
+    factors = compute_factor_matrix(df, past_runs, history_store=history_store, connection_stats=connection_stats)
+    non_odds = [name for name in FACTOR_NAMES if name != "odds"]
+    return {
+        "url": url,
+        "race": df[["Race Date", "Race Time", "Race Location", "Race Name"]].iloc[:1].copy(),
+        "runners": df[["Horse Name", "Odds"]].copy(),
+        "fixed_scores": factors[non_odds].to_numpy() @ np.array([weights[name] for name in non_odds], dtype=float),
+        "odds_weight": float(weights["odds"]),
+    }
+
+def reprice_race(state, odds=None):
+    # odds maps Horse Name -> price in the Odds column format ("'5/2"); horses it omits keep their last price.
+    runners = state["runners"]
+    if odds:
+        runners["Odds"] = [odds.get(name, price) for name, price in zip(runners["Horse Name"], runners["Odds"])]
+    scored = runners.copy()
+    scored["Composite Score"] = state["fixed_scores"] + state["odds_weight"] * odds_factors(runners["Odds"])
+    return priced_output(scored)[0]
+
+def reprice_card(states, workers=SCRAPE_WORKERS, timeout=10):
+    # Re-reads BetLink prices for every prepared race in parallel over HTTP and re-prices each one.
+    # Returns {url: output table}; a race whose prices could not be read is re-priced on its last odds.
+    def refresh(state):
+        try:
+            odds = fetch_race_odds(state["url"], timeout=timeout)
+        except Exception:
+            odds = None
+        return state["url"], reprice_race(state, odds)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return dict(executor.map(refresh, states))
+
+##############################
+# Meeting Mode
+##############################
+SPORTING_LIFE_URL = "https://www.sportinglife.com"
+RACECARDS_INDEX = SPORTING_LIFE_URL + "/racing/racecards/{date}"
+MEETING_COLUMNS = ["Race Time", "Race Location", "Race Name", "URL", "Horse Name", "Odds", "CFO", "MV", "Value"]
+RACECARD_LINK_RE = re.compile(r"/racing/racecards/(\d{4}-\d{2}-\d{2})/([a-z0-9-]+)/racecard/(\d+)(?:/[^\s\"'?#]*)?")
+
+def course_slug(course):
+    return re.sub(r"[^a-z0-9]+", "-", course.lower()).strip("-")
+
+def meeting_date(value=None):
+    # "today", "tomorrow", a date/datetime, "YYYY-MM-DD" or "DD/MM/YYYY" -> "YYYY-MM-DD".
+    if value is None or str(value).lower() == "today":
+        return date.today().isoformat()
+    if str(value).lower() == "tomorrow":
+        return (date.today() + timedelta(days=1)).isoformat()
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    for fmt in ("%Y-%m-%d", "%d/%m/%Y", "%d/%m/%y"):
+        try:
+            return datetime.strptime(str(value).strip(), fmt).date().isoformat()
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognised meeting date: {value!r}")
+
+def parse_race_links(html, base_url=SPORTING_LIFE_URL, course=None, race_date=None):
+    # Racecard URLs in page order, one per race id, optionally only those at `course` on `race_date`.
+    from bs4 import BeautifulSoup, SoupStrainer
+    slug = course_slug(course) if course else None
+    urls, seen = [], set()
+    for anchor in BeautifulSoup(html, "html.parser", parse_only=SoupStrainer("a", href=RACECARD_LINK_RE)).find_all("a"):
+        match = RACECARD_LINK_RE.search(anchor["href"])
+        link_date, link_course, race_id = match.groups()
+        if race_id in seen or (race_date and link_date != race_date):
+            continue
+        if slug and link_course != slug and not link_course.startswith(slug + "-"):
+            continue
+        seen.add(race_id)
+        urls.append(urljoin(base_url, match.group(0)))
+    return urls
+
+def discover_race_urls(course=None, race_date=None, index_url=None, pool=None, timeout=PAGE_TIMEOUT, source="auto"):
+    # Every race at `course` on `race_date` from the day's racecard index, or every race linked from
+    # `index_url` (a meeting page). Like the racecards themselves, the index is read over HTTP and
+    # only loaded in the browser when the server-rendered page has no race links.
+    race_date = meeting_date(race_date) if race_date or not index_url else None
+    index_url = index_url or RACECARDS_INDEX.format(date=race_date)
+    urls = []
+    with span("meeting.discover", index=index_url):
+        if source in ("auto", "http"):
+            try:
+                urls = parse_race_links(fetch_race_card_html(index_url, timeout=timeout), index_url, course, race_date)
+            except Exception as e:
+                if source == "http":
+                    raise
+                print(f"HTTP fetch failed for '{index_url}' ({e}); falling back to the browser.")
+        if not urls and source in ("auto", "browser"):
+            if pool is None:
+                with DriverPool() as pool:
+                    return discover_race_urls(course, race_date, index_url, pool, timeout, "browser")
+            with pool.driver() as driver:
+                driver.set_page_load_timeout(timeout)
+                driver.get(index_url)
+                urls = parse_race_links(driver.page_source, index_url, course, race_date)
+    return urls
+
+def model_meeting(weights, course=None, race_date=None, index_url=None, urls=None, workers=SCRAPE_WORKERS,
+                  pool=None, source="auto", cache=None, history_store=None, connection_stats=None):
+    # Scrapes every race of a meeting concurrently through one DriverPool and the shared racecard
+    # cache, models each as soon as it arrives and returns one table: a row per runner, with the
+    # race's time, course, name and URL ahead of the usual model_race columns, in race-time order.
+    if pool is None:
+        # Browsers only launch if a page needs the fallback; discovery and every race then share them.
+        with DriverPool(size=workers) as pool:
+            return model_meeting(weights, course, race_date, index_url, urls, workers, pool, source, cache, history_store, connection_stats)
+    urls = urls or discover_race_urls(course, race_date, index_url, pool=pool, source=source)
+    if not urls:
+        print(f"No races found for {course or index_url} on {race_date or 'the index page'}.")
+        return pd.DataFrame(columns=MEETING_COLUMNS)
+    tables = []
+    with span("model_meeting", races=len(urls)):
+        for url, race_file, error in fetch_race_cards_concurrently(urls, workers=workers, pool=pool, source=source, cache=cache):
+            if error is not None:
+                print(f"❌ Failed to scrape {url}: {error}")
+                continue
+            race = load_race_card(race_file).iloc[0]
+            output_df = model_race(race_file, weights, history_store=history_store, connection_stats=connection_stats)
+            tables.append(output_df.assign(**{
+                "Race Time": race["Race Time"], "Race Location": race["Race Location"], "Race Name": race["Race Name"], "URL": url,
+            }))
+    if not tables:
+        return pd.DataFrame(columns=MEETING_COLUMNS)
+    meeting = pd.concat(tables, ignore_index=True)
+    meeting = meeting.sort_values(["Race Time", "URL"], kind="stable").reset_index(drop=True)
+    return meeting[MEETING_COLUMNS]
+
 ##############################
 # Main Execution
 ##############################
 if __name__ == "__main__":
     race_urls = []
-    print("\n📌 Enter race URLs (one per line). Type 'done' when finished.")
+    meetings = []
+    print("\n📌 Enter race URLs (one per line), or 'meeting <course> [date]' for every race at a meeting. Type 'done' when finished.")
     while True:
         url = input("Enter URL: ").strip()
         if url.lower() == "done":
             break
         elif url.startswith("http"):
             race_urls.append(url)
+        elif url.lower().startswith("meeting ") and len(url.split()) > 1:
+            words = url.split()[1:]
+            try:
+                meetings.append((" ".join(words[:-1]), meeting_date(words[-1])) if len(words) > 1 else (words[0], meeting_date()))
+            except ValueError:
+                meetings.append((" ".join(words), meeting_date()))
         else:
-            print("Please enter a valid URL or 'done' to finish.")
+            print("Please enter a valid URL, 'meeting <course> [date]' or 'done' to finish.")
 
-    default_weights = {
-        "odds": 40,
-        "official_rating": 10,
-        "past_performance": 45,
-        "similar_conditions": 50,
-        "stall": 5,
-        "headgear": 5,
-        "age": 5,
-        "last_ran": 40,
-        "weight_field": 20,
-        "recent_form": 20,
-        "comments": 10,
-        "course": 20,
-        "going_suitability": 20,
-        "distance_suitability": 20,
-        "jockey_trainer": 20,
-        "class": 20
-    }
+    default_weights = DEFAULT_WEIGHTS
 
     if race_urls:
-        for url in race_urls:
-            csv_file = fetch_race_card_data(url)
-            if csv_file:
+        for url, csv_file, error in fetch_race_cards_concurrently(race_urls):
+            if error is not None:
+                print(f"❌ Failed to scrape {url}: {error}")
+            elif csv_file:
                 model_race(csv_file, default_weights)
-    else:
+    for course, race_date in meetings:
+        meeting = model_meeting(default_weights, course, race_date)
+        if not meeting.empty:
+            print(f"\n=== {course} {race_date}: {meeting['URL'].nunique()} races ===")
+            print(meeting.drop(columns=["URL"]).to_string(index=False))
+    if not race_urls and not meetings:
         print("No valid URLs were provided.")